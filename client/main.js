@@ -5,6 +5,8 @@ const { spawn } = require('child_process');
 
 let pythonProcess = null;
 const SERVER_URL = 'http://127.0.0.1:5000';
+// 'script': 자유 형식 ExtendScript, 'commands': executeCommand 명령 배치
+const GENERATION_MODE = localStorage.getItem('generation_mode') || 'script';
 
 // ==================== Conversation State Management ====================
 const ConversationState = {
@@ -18,6 +20,7 @@ let conversationState = {
     status: ConversationState.IDLE,
     context: {},
     pendingCode: null,
+    pendingType: null,
     history: []
 };
 
@@ -117,6 +120,8 @@ function startPythonServer() {
 
             // If process spawns successfully, we set it
             pythonProcess = proc;
+            // 서버는 무거운 모듈을 백그라운드에서 로드하므로 /health가 곧바로 응답합니다.
+            pollUntilConnected();
 
             // But we don't declare success until /health check passes
             // Just log output for debugging
@@ -136,6 +141,16 @@ function startPythonServer() {
     tryStartServer(0);
 }
 
+// 서버를 띄운 직후에는 3초 주기를 기다리지 않고 짧은 간격으로 확인합니다.
+const FAST_POLL_INTERVAL = 200;
+const FAST_POLL_LIMIT = 50;
+
+function pollUntilConnected(attempt = 0) {
+    if (isServerConnected || attempt >= FAST_POLL_LIMIT || !pythonProcess) return;
+    checkServerConnection();
+    setTimeout(() => pollUntilConnected(attempt + 1), FAST_POLL_INTERVAL);
+}
+
 // Start polling for connection
 setInterval(checkServerConnection, 3000);
 checkServerConnection();
@@ -250,7 +265,7 @@ function renderConfirmationMessage(data) {
     conversationState.context = data;
 }
 
-function renderCodePreview(code, type = 'extendscript') {
+function renderCodePreview(code, type = 'extendscript', preview = code) {
     const codeDiv = document.createElement('div');
     codeDiv.className = 'message bot-confirmation';
 
@@ -262,7 +277,7 @@ function renderCodePreview(code, type = 'extendscript') {
                 <span class="code-toggle">▼</span>
             </div>
             <div class="code-content">
-                <pre>${escapeHtml(code)}</pre>
+                <pre>${escapeHtml(preview)}</pre>
             </div>
         </div>
         <div class="action-buttons">
@@ -276,6 +291,18 @@ function renderCodePreview(code, type = 'extendscript') {
 
     conversationState.status = ConversationState.CONFIRMING;
     conversationState.pendingCode = code;
+    conversationState.pendingType = type;
+}
+
+function showValidationResult(validation) {
+    if (!validation) return;
+
+    if (validation.valid) {
+        if (validation.repaired) addSystemMessage('🔧 서버 검증에서 발견된 문제를 자동으로 수정했습니다.');
+        return;
+    }
+
+    addSystemMessage(`⚠️ 코드 검증 실패 (실행 전 확인해주세요):\n- ${validation.errors.join('\n- ')}`);
 }
 
 // ==================== Action Handlers (Global for onclick) ====================
@@ -301,7 +328,8 @@ window.handleConfirmRequest = async function () {
             body: JSON.stringify({
                 apiKey: apiKey,
                 context: conversationState.context,
-                history: conversationState.history
+                history: conversationState.history,
+                mode: GENERATION_MODE
             })
         });
 
@@ -315,7 +343,11 @@ window.handleConfirmRequest = async function () {
 
         const data = await response.json();
 
-        if (data.code) {
+        showValidationResult(data.validation);
+
+        if (data.type === 'commands' && data.code) {
+            renderCodePreview(data.code, 'commands', JSON.stringify(data.commands, null, 2));
+        } else if (data.code) {
             renderCodePreview(data.code, data.type || 'extendscript');
         } else {
             addBotMessage('❌ 코드가 생성되지 않았습니다.');
@@ -343,6 +375,28 @@ window.handleExecuteCode = function (code) {
 
     addSystemMessage('⚙️ After Effects에서 코드 실행 중...');
 
+    // 명령 배치는 host의 executeCommandBatch가 Undo Group 하나로 실행합니다.
+    if (conversationState.pendingType === 'commands') {
+        csInterface.evalScript(conversationState.pendingCode, (result) => {
+            try {
+                const batch = JSON.parse(result);
+                if (batch.status === 'success') {
+                    addSystemMessage(`✅ 명령 ${batch.executed}개 실행 완료! (Ctrl+Z로 한 번에 되돌릴 수 있습니다)`);
+                } else {
+                    const last = batch.results && batch.results[batch.results.length - 1];
+                    addSystemMessage(`❌ 명령 실행 실패 (${batch.executed}/${batch.total}): ${last ? last.result.message : batch.message}`);
+                }
+            } catch (e) {
+                addSystemMessage(`✅ 실행 결과: ${result}`);
+            }
+
+            conversationState.status = ConversationState.IDLE;
+            conversationState.pendingCode = null;
+            conversationState.pendingType = null;
+        });
+        return;
+    }
+
     const wrappedCode = `
     app.beginUndoGroup("AI Generated Action");
     try {
@@ -461,6 +515,7 @@ sendBtn.addEventListener('click', async () => {
                     break;
 
                 case 'code':
+                    showValidationResult(data.validation);
                     renderCodePreview(data.data.code, data.data.type);
                     break;
 
@@ -82,6 +82,67 @@ function runScript(code) {
     }
 }
 
+/**
+ * 명령 이름에 맞는 ae-functions.jsx 함수를 호출하는 함수
+ * Undo Group은 호출하는 쪽(executeCommand / executeCommandBatch)에서 관리
+ * 
+ * @param {string} command - 실행할 명령 이름
+ * @param {Object} args - 명령에 필요한 인자들
+ * @returns {string} JSON 형태의 실행 결과
+ */
+function dispatchCommand(command, args) {
+    switch (command) {
+        // 컴포지션 생성
+        case "createComposition":
+            return createComposition(args);
+
+        // 레이어 생성
+        case "createTextLayer":
+            return createTextLayer(args);
+
+        case "createShapeLayer":
+            return createShapeLayer(args);
+
+        case "createSolidLayer":
+            return createSolidLayer(args);
+
+        // 레이어 속성 제어
+        case "setLayerProperties":
+            return setLayerProperties(args);
+
+        case "setLayerKeyframe":
+            // args에서 값 추출
+            return setLayerKeyframe(
+                args.compIndex,
+                args.layerIndex,
+                args.propertyName,
+                args.timeInSeconds,
+                args.value
+            );
+
+        case "setLayerExpression":
+            return setLayerExpression(
+                args.compIndex,
+                args.layerIndex,
+                args.propertyName,
+                args.expressionString
+            );
+
+        // 이펙트
+        case "applyEffect":
+            return applyEffect(args);
+
+        case "applyEffectTemplate":
+            return applyEffectTemplate(args);
+
+        default:
+            return JSON.stringify({
+                status: "error",
+                message: "Unknown command: " + command + ". Available commands: createComposition, createTextLayer, createShapeLayer, createSolidLayer, setLayerProperties, setLayerKeyframe, setLayerExpression, applyEffect, applyEffectTemplate"
+            });
+    }
+}
+
 /**
  * 구조화된 명령을 실행하는 함수 (ae-functions.jsx의 함수 호출)
  * Gemini가 JSON 형태로 명령을 전달하면 해당 함수를 실행
@@ -94,68 +155,7 @@ function executeCommand(command, args) {
     app.beginUndoGroup(command);
 
     try {
-        var result;
-
-        switch (command) {
-            // 컴포지션 생성
-            case "createComposition":
-                result = createComposition(args);
-                break;
-
-            // 레이어 생성
-            case "createTextLayer":
-                result = createTextLayer(args);
-                break;
-
-            case "createShapeLayer":
-                result = createShapeLayer(args);
-                break;
-
-            case "createSolidLayer":
-                result = createSolidLayer(args);
-                break;
-
-            // 레이어 속성 제어
-            case "setLayerProperties":
-                result = setLayerProperties(args);
-                break;
-
-            case "setLayerKeyframe":
-                // args에서 값 추출
-                result = setLayerKeyframe(
-                    args.compIndex,
-                    args.layerIndex,
-                    args.propertyName,
-                    args.timeInSeconds,
-                    args.value
-                );
-                break;
-
-            case "setLayerExpression":
-                result = setLayerExpression(
-                    args.compIndex,
-                    args.layerIndex,
-                    args.propertyName,
-                    args.expressionString
-                );
-                break;
-
-            // 이펙트
-            case "applyEffect":
-                result = applyEffect(args);
-                break;
-
-            case "applyEffectTemplate":
-                result = applyEffectTemplate(args);
-                break;
-
-            default:
-                result = JSON.stringify({
-                    status: "error",
-                    message: "Unknown command: " + command + ". Available commands: createComposition, createTextLayer, createShapeLayer, createSolidLayer, setLayerProperties, setLayerKeyframe, setLayerExpression, applyEffect, applyEffectTemplate"
-                });
-        }
-
+        var result = dispatchCommand(command, args);
         app.endUndoGroup();
         return result;
 
@@ -168,4 +168,56 @@ function executeCommand(command, args) {
     }
 }
 
+/**
+ * 여러 명령을 하나의 Undo Group 안에서 한 번에 실행하는 함수
+ * 서버가 검증한 명령 목록을 evalScript 한 번으로 전달받아 순서대로 실행
+ * 오류가 난 명령에서 멈추고, 그때까지의 결과를 반환
+ * 
+ * @param {string} batchJson - [{command, args}, ...] 형태의 JSON 문자열
+ * @returns {string} JSON 형태의 실행 결과
+ */
+function executeCommandBatch(batchJson) {
+    var commands;
+    try {
+        commands = JSON.parse(batchJson);
+    } catch (e) {
+        return JSON.stringify({
+            status: "error",
+            message: "Invalid command batch: " + e.toString()
+        });
+    }
+
+    var results = [];
+    var status = "success";
+
+    app.beginUndoGroup("AI Command Batch");
+
+    try {
+        for (var i = 0; i < commands.length; i++) {
+            var item = commands[i];
+            var result = JSON.parse(dispatchCommand(item.command, item.args || {}));
+            results.push({ command: item.command, result: result });
+
+            if (result.status === "error") {
+                status = "error";
+                break;
+            }
+        }
+    } catch (e) {
+        status = "error";
+        results.push({
+            command: item ? item.command : "",
+            result: { status: "error", message: e.toString() }
+        });
+    }
+
+    app.endUndoGroup();
+
+    return JSON.stringify({
+        status: status,
+        executed: results.length,
+        total: commands.length,
+        results: results
+    });
+}
 
@@ -0,0 +1,133 @@
+import heapq
+import re
+
+# 길이 제한 (기존 크롤러 기준과 동일)
+MIN_BENEFIT_CHARS = 8
+MAX_BENEFIT_CHARS = 160
+# 템플릿 텍스트 슬롯에 잘 맞는 길이 구간
+IDEAL_MIN_CHARS = 20
+IDEAL_MAX_CHARS = 90
+# 문자 3-gram 자카드 유사도가 이 값 이상이면 같은 문장으로 봅니다.
+DUPLICATE_SIMILARITY = 0.8
+
+# 줄 앞의 글머리 기호
+BULLET_RE = re.compile(r"^\s*(?:[-*•·▪■□◆◇▶►✔✓★☆※]+|\d+[.)]|[①-⑳])\s*")
+# 문장 끝: 영문/전각 마침표 뒤 공백, 또는 한국어 종결 어미(다/요/죠/음/함/됨/임) 뒤 마침표
+SENTENCE_END_RE = re.compile(r"(?<=[.!?。！？])\s+|(?<=[다요죠음함됨임][.!?])(?=\S)")
+# 다음 줄과 이어지는 문장으로 볼 끝맺음: 쉼표, 한국어 연결 어미/조사
+CONTINUATION_RE = re.compile(r"(?:,|하여|위해|통해|[고며서면및를을에])$")
+TERMINATORS = ".!?。！？"
+
+# 베네핏 문장에 자주 나오는 단어 (영문은 어간 일치)
+KEYWORD_RE = re.compile(
+    r"hydrat|moistur|brighten|sooth|calm|wrinkle|firm|elastic|glow|radian|protect|nourish|"
+    r"repair|barrier|plump|smooth|clear|pore|even|long[- ]lasting|lightweight|gentle|"
+    r"보습|수분|진정|미백|브라이트닝|주름|탄력|광채|윤기|영양|장벽|개선|효과|케어|촉촉|산뜻|"
+    r"매끈|밀착|지속|커버|흡수|자극|피부결|모공|톤업|생기",
+    re.IGNORECASE,
+)
+# 수치 근거(예: 72시간, 98%)는 카피로 쓰기 좋습니다.
+CLAIM_RE = re.compile(r"\d+\s*(?:%|hours?|hrs?|days?|weeks?|시간|일|주|배)", re.IGNORECASE)
+# 베네핏이 아닌 안내문/성분표/링크
+BOILERPLATE_RE = re.compile(
+    r"ingredients?|how to use|directions|caution|warning|shipping|return policy|https?://|www\.|©|"
+    r"전성분|사용법|사용 방법|주의사항|배송|교환|반품|고객센터",
+    re.IGNORECASE,
+)
+NORMALIZE_RE = re.compile(r"[\W_]+")
+
+
+def _merge_lines(text):
+    """줄 단위로 나누고, 문장이 끊긴 줄은 다음 줄과 이어 붙입니다."""
+    merged = []
+    continues = False
+    for raw_line in text.replace("\r", "\n").split("\n"):
+        stripped = raw_line.strip()
+        if not stripped:
+            continues = False
+            continue
+        bullet = BULLET_RE.match(stripped)
+        line = stripped[bullet.end():] if bullet else stripped
+        if not line:
+            continue
+
+        # 영문 소문자로 시작하거나, 이전 줄이 연결 어미/쉼표로 끝났으면 같은 문장입니다.
+        if merged and not bullet and (continues or line[0].islower()) and merged[-1][-1] not in TERMINATORS:
+            merged[-1] = f"{merged[-1]} {line}"
+        else:
+            merged.append(line)
+        continues = bool(CONTINUATION_RE.search(line))
+    return merged
+
+
+def segment_sentences(text):
+    """설명 텍스트를 문장 목록으로 나눕니다 (한국어 종결 어미/글머리 기호 처리)."""
+    if not text:
+        return []
+    sentences = []
+    for line in _merge_lines(text):
+        for part in SENTENCE_END_RE.split(line):
+            part = part.strip()
+            if part:
+                sentences.append(part)
+    return sentences
+
+
+def score_sentence(sentence, position, total):
+    """키워드/수치 근거/위치/길이로 베네핏 점수를 매깁니다."""
+    length = len(sentence)
+    if length < MIN_BENEFIT_CHARS or length > MAX_BENEFIT_CHARS:
+        return None
+    if BOILERPLATE_RE.search(sentence):
+        return None
+
+    score = min(len(KEYWORD_RE.findall(sentence)), 3) * 1.0
+    if CLAIM_RE.search(sentence):
+        score += 1.0
+    # 설명 앞부분에 핵심 문장이 오는 경우가 많습니다.
+    score += 1.0 - (position / total if total else 0)
+    if IDEAL_MIN_CHARS <= length <= IDEAL_MAX_CHARS:
+        score += 1.0
+    elif length > IDEAL_MAX_CHARS:
+        score -= (length - IDEAL_MAX_CHARS) / (MAX_BENEFIT_CHARS - IDEAL_MAX_CHARS)
+    return score
+
+
+def _shingles(sentence):
+    """유사도 비교용 문자 3-gram 집합을 만듭니다."""
+    normalized = NORMALIZE_RE.sub("", sentence.lower())
+    if len(normalized) < 3:
+        return {normalized}
+    return {normalized[i:i + 3] for i in range(len(normalized) - 2)}
+
+
+def _similarity(a, b):
+    return len(a & b) / len(a | b) if a and b else 0.0
+
+
+def extract_benefits(text, limit=5):
+    """설명에서 점수가 높은 베네핏 문장을 중복 없이 골라 점수순으로 돌려줍니다."""
+    sentences = segment_sentences(text)
+    total = len(sentences)
+
+    scored = []
+    for position, sentence in enumerate(sentences):
+        score = score_sentence(sentence, position, total)
+        if score is not None:
+            scored.append((-score, position, sentence))
+    # 전체 정렬 대신 힙에서 필요한 만큼만 꺼냅니다.
+    heapq.heapify(scored)
+
+    selected = []
+    selected_shingles = []
+    while scored:
+        _, _, sentence = heapq.heappop(scored)
+        shingles = _shingles(sentence)
+        # 비교 대상은 이미 고른 최대 limit개뿐이라 입력이 길어져도 비용이 늘지 않습니다.
+        if any(_similarity(shingles, kept) >= DUPLICATE_SIMILARITY for kept in selected_shingles):
+            continue
+        selected.append(sentence)
+        selected_shingles.append(shingles)
+        if len(selected) >= limit:
+            break
+    return selected
@@ -0,0 +1,146 @@
+import json
+import os
+import re
+from functools import lru_cache
+
+
+HOST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "host")
+MAX_BATCH_COMMANDS = 50
+
+# executeCommand의 switch 문에서 지원하는 명령 이름을 읽습니다.
+COMMAND_CASE_RE = re.compile(r'case\s+"(\w+)"\s*:')
+DOC_BLOCK_RE = re.compile(r"/\*\*(.*?)\*/\s*function\s+(\w+)\s*\(", re.DOTALL)
+# @param {타입} 이름 - 설명 (설명에 값 형식/범위/기본값이 들어 있습니다)
+PARAM_RE = re.compile(r"@param\s+\{(\w+)\}\s+([\w.]+)[ \t]*(?:-[ \t]*([^\n]*))?")
+
+# JSDoc 타입 → 허용되는 Python(JSON) 타입
+TYPE_MAP = {
+    "string": (str,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "Array": (list,),
+    "Object": (dict,),
+}
+
+# JSDoc만으로 알 수 없는 필수 인자 규칙입니다. (함수 안에서 throw 하는 조건)
+REQUIRED_ARGS = {
+    "applyEffectTemplate": ("templateName",),
+}
+REQUIRED_ONE_OF = {
+    "applyEffect": ("effectName", "effectMatchName"),
+}
+
+
+@lru_cache(maxsize=1)
+def load_command_schema(host_dir=HOST_DIR):
+    """host/*.jsx에서 executeCommand가 받는 명령과 인자 타입을 추출합니다."""
+    with open(os.path.join(host_dir, "index.jsx"), "r", encoding="utf-8") as handle:
+        commands = COMMAND_CASE_RE.findall(handle.read())
+    with open(os.path.join(host_dir, "ae-functions.jsx"), "r", encoding="utf-8") as handle:
+        source = handle.read()
+
+    docs = {}
+    for doc, name in DOC_BLOCK_RE.findall(source):
+        # 문서 블록이 여러 함수를 건너뛰지 않도록 마지막 블록만 사용합니다.
+        doc = doc.rsplit("/**", 1)[-1]
+        docs[name] = PARAM_RE.findall(doc)
+
+    schema = {}
+    for command in commands:
+        params = docs.get(command, [])
+        properties = {}
+        descriptions = {}
+        required = list(REQUIRED_ARGS.get(command, ()))
+        for type_name, param, description in params:
+            if param == "args":
+                continue
+            if param.startswith("args."):
+                param = param[len("args."):]
+            else:
+                # setLayerKeyframe처럼 위치 인자를 받는 함수는 모든 인자가 필수입니다.
+                required.append(param)
+            properties[param] = type_name
+            descriptions[param] = description.strip()
+        schema[command] = {
+            "properties": properties,
+            "descriptions": descriptions,
+            "required": required,
+            "oneOf": list(REQUIRED_ONE_OF.get(command, ())),
+        }
+    return schema
+
+
+def _type_matches(value, type_name):
+    """JSON 값이 JSDoc 타입과 맞는지 확인합니다."""
+    expected = TYPE_MAP.get(type_name)
+    if expected is None:
+        return True
+    if isinstance(value, bool) and bool not in expected:
+        return False
+    return isinstance(value, expected)
+
+
+def validate_command_batch(commands, schema=None):
+    """모델이 만든 명령 목록을 스키마로 검사하고, (정리된 목록, 오류 목록)을 돌려줍니다."""
+    schema = schema or load_command_schema()
+
+    if not isinstance(commands, list) or not commands:
+        return [], ["commands는 비어 있지 않은 배열이어야 합니다"]
+    if len(commands) > MAX_BATCH_COMMANDS:
+        return [], [f"명령은 최대 {MAX_BATCH_COMMANDS}개까지 보낼 수 있습니다"]
+
+    normalized = []
+    errors = []
+    for index, item in enumerate(commands):
+        label = f"commands[{index}]"
+        if not isinstance(item, dict):
+            errors.append(f"{label}: 객체여야 합니다")
+            continue
+
+        command = item.get("command")
+        args = item.get("args", {})
+        if command not in schema:
+            errors.append(f"{label}: 알 수 없는 명령입니다: {command}")
+            continue
+        if not isinstance(args, dict):
+            errors.append(f"{label}: args는 객체여야 합니다")
+            continue
+
+        spec = schema[command]
+        for key, value in args.items():
+            if key not in spec["properties"]:
+                errors.append(f"{label}: {command}에 없는 인자입니다: {key}")
+            elif not _type_matches(value, spec["properties"][key]):
+                errors.append(f"{label}: {key}는 {spec['properties'][key]} 타입이어야 합니다")
+        for key in spec["required"]:
+            if key not in args:
+                errors.append(f"{label}: {command}에 필수 인자가 없습니다: {key}")
+        if spec["oneOf"] and not any(args.get(key) for key in spec["oneOf"]):
+            errors.append(f"{label}: {' 또는 '.join(spec['oneOf'])} 중 하나가 필요합니다")
+
+        normalized.append({"command": command, "args": args})
+
+    return normalized, errors
+
+
+def describe_commands(schema=None):
+    """프롬프트에 넣을 명령 목록 설명을 만듭니다. 인자마다 타입과 JSDoc 설명(형식/범위/기본값)을 붙입니다."""
+    schema = schema or load_command_schema()
+    lines = []
+    for command, spec in schema.items():
+        params = ", ".join(
+            f"{name}{'' if name in spec['required'] else '?'}" for name in spec["properties"]
+        )
+        lines.append(f"- {command}({params})")
+        for name, type_name in spec["properties"].items():
+            description = spec.get("descriptions", {}).get(name)
+            if description:
+                lines.append(f"    {name}: {type_name} - {description}")
+    return "\n".join(lines)
+
+
+def build_batch_script(commands):
+    """검증된 명령 목록을 evalScript 한 번으로 실행할 ExtendScript 호출로 만듭니다."""
+    # JSON 문자열을 한 번 더 JSON 인코딩하면 ES3 문자열 리터럴로 안전하게 넘길 수 있습니다.
+    payload = json.dumps(commands)
+    return f"executeCommandBatch({json.dumps(payload)})"
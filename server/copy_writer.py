@@ -0,0 +1,145 @@
+import json
+import re
+import unicodedata
+
+try:
+    from product_context import TEXT_SLOTS
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .product_context import TEXT_SLOTS
+
+# 슬롯별 (최대 줄 수, 줄당 최대 폭). 폭은 한글/전각 2, 영문/숫자 1로 셉니다.
+# 1920x1080 화면 기준 템플릿 규칙 "텍스트는 2~3줄 이내"에 맞춘 값입니다.
+SLOT_LIMITS = {
+    "title": (2, 32),
+    "benefit_1": (3, 36),
+    "benefit_2": (3, 36),
+    "usage": (2, 36),
+    "cta": (2, 32),
+}
+MAX_VARIANTS = 5
+ELLIPSIS = "…"
+WHITESPACE_RE = re.compile(r"[ \t]+")
+
+
+def text_width(text):
+    """화면 폭 기준 글자 수 (한글/전각 문자는 2칸)."""
+    return sum(2 if unicodedata.east_asian_width(char) in "WF" else 1 for char in text)
+
+
+def _wrap_words(words, max_width):
+    """단어 단위로 줄을 채웁니다. 한 줄보다 긴 단어는 글자 단위로 자릅니다."""
+    lines = []
+    current = ""
+    for word in words:
+        candidate = f"{current} {word}" if current else word
+        if text_width(candidate) <= max_width:
+            current = candidate
+            continue
+        if current:
+            lines.append(current)
+        current = ""
+        for char in word:
+            if text_width(current + char) > max_width:
+                lines.append(current)
+                current = ""
+            current += char
+    if current:
+        lines.append(current)
+    return lines
+
+
+def fit_slot_text(text, max_lines, max_width):
+    """문구를 줄 폭에 맞게 다시 줄바꿈하고 (줄 목록, 제한 안에 들어왔는지)를 돌려줍니다."""
+    lines = []
+    for raw_line in str(text or "").splitlines():
+        words = WHITESPACE_RE.sub(" ", raw_line).strip().split(" ")
+        lines.extend(_wrap_words([word for word in words if word], max_width))
+    return lines, 0 < len(lines) <= max_lines
+
+
+def truncate_lines(lines, max_lines, max_width):
+    """재요청 후에도 넘치는 문구를 마지막 줄 말줄임표로 자릅니다."""
+    if len(lines) <= max_lines:
+        return lines
+    kept = lines[:max_lines]
+    last = kept[-1]
+    while last and text_width(last + ELLIPSIS) > max_width:
+        last = last[:-1]
+    kept[-1] = last.rstrip() + ELLIPSIS
+    return kept
+
+
+def build_copy_prompt(product_block, variants=1, language="ko"):
+    """모든 텍스트 슬롯 문구를 한 번에 JSON으로 받는 프롬프트를 만듭니다."""
+    limits = "\n".join(
+        f'    - "{slot}": at most {lines} lines, each line at most {width} columns '
+        f"(Hangul/CJK characters count as 2 columns)"
+        for slot, (lines, width) in SLOT_LIMITS.items()
+    )
+    return f"""{product_block}
+
+    Write on-screen copy for the 5-cut product video template (docs/template-spec.md).
+    One message per cut. Language: {language}.
+
+    SLOTS AND LIMITS:
+{limits}
+    - Use "\\n" for line breaks inside a slot
+    - title = brand + product name, benefit_1/benefit_2 = one benefit each,
+      usage = texture/feel keywords, cta = purchase prompt or promotion
+
+    Return ONLY valid JSON with exactly {variants} variant(s), each using a different angle for A/B tests:
+    {{"variants": [{{{", ".join(f'"{slot}": "..."' for slot in TEXT_SLOTS)}}}]}}
+    """
+
+
+def validate_copy(payload, variants):
+    """모델 응답을 검사해 (슬롯별 줄 목록으로 정리한 변형 목록, 오류 목록)을 돌려줍니다."""
+    items = payload.get("variants") if isinstance(payload, dict) else None
+    if not isinstance(items, list) or not items:
+        return [], ["variants는 비어 있지 않은 배열이어야 합니다"]
+
+    normalized = []
+    errors = []
+    if len(items) != variants:
+        errors.append(f"variants는 {variants}개여야 합니다 (현재 {len(items)}개)")
+    for index, item in enumerate(items[:variants]):
+        if not isinstance(item, dict):
+            errors.append(f"variants[{index}]: 객체여야 합니다")
+            continue
+        slots = {}
+        for slot in TEXT_SLOTS:
+            max_lines, max_width = SLOT_LIMITS[slot]
+            lines, fits = fit_slot_text(item.get(slot), max_lines, max_width)
+            if not lines:
+                errors.append(f"variants[{index}].{slot}: 문구가 없습니다")
+            elif not fits:
+                errors.append(
+                    f"variants[{index}].{slot}: {max_lines}줄(줄당 {max_width}칸)을 넘습니다 "
+                    f"({len(lines)}줄): {' / '.join(lines)}"
+                )
+            slots[slot] = lines
+        normalized.append(slots)
+    return normalized, errors
+
+
+def finalize_copy(normalized):
+    """줄 목록을 화면용 문자열로 합치고, 넘치는 슬롯은 잘라냅니다."""
+    results = []
+    for slots in normalized:
+        item = {}
+        for slot, lines in slots.items():
+            max_lines, max_width = SLOT_LIMITS[slot]
+            item[slot] = "\n".join(truncate_lines(lines, max_lines, max_width))
+        results.append(item)
+    return results
+
+
+def build_copy_repair_prompt(prompt, errors, previous):
+    """길이/형식 오류를 알려주고 고친 JSON을 다시 요청하는 프롬프트입니다."""
+    return (
+        f"{prompt}\n\nYour previous answer failed validation:\n"
+        + "\n".join(f"- {error}" for error in errors)
+        + f"\n\nPrevious answer:\n{json.dumps(previous, ensure_ascii=False)}\n\n"
+        "Shorten the copy where needed and return the corrected JSON."
+    )
@@ -1,9 +1,23 @@
 import json
-import re
 from urllib.parse import urlparse, urlunparse
 
-import requests
-from bs4 import BeautifulSoup
+try:
+    from benefits import extract_benefits
+    from image_selector import canonical_image_url, select_images
+    from lazy_import import lazy_import
+    from product_store import content_hash, diff_products, get_record, save_record, touch_record
+    from site_extractors import find_rule, select_nodes
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .benefits import extract_benefits
+    from .image_selector import canonical_image_url, select_images
+    from .lazy_import import lazy_import
+    from .product_store import content_hash, diff_products, get_record, save_record, touch_record
+    from .site_extractors import find_rule, select_nodes
+
+# bs4/requests는 첫 크롤링 때 로드합니다 (서버 시작 시간 단축).
+bs4 = lazy_import("bs4")
+requests = lazy_import("requests")
 
 
 # 웹사이트가 정상 HTML을 돌려주도록 최신 User-Agent를 사용합니다.
@@ -13,6 +27,8 @@ USER_AGENT = (
     "Chrome/120.0 Safari/537.36"
 )
 ALLOWED_SCHEMES = ("http://", "https://")
+# 상점 정보 URL → 기본 통화 (성공한 조회만 기억합니다)
+_shop_currencies = {}
 
 
 def fetch_html(url, timeout=20):
@@ -35,16 +51,15 @@ def fetch_html(url, timeout=20):
     return html
 
 
-def _unique(items):
-    """중복을 제거하되, 원래 순서는 유지합니다."""
-    seen = set()
-    result = []
-    for item in items:
-        if not item or item in seen:
-            continue
-        seen.add(item)
-        result.append(item)
-    return result
+def fetch_json(url, timeout=20):
+    """사이트 JSON API(예: Shopify /products/<handle>.json)를 호출합니다."""
+    headers = {"User-Agent": USER_AGENT, "Accept": "application/json"}
+    try:
+        response = requests.get(url, headers=headers, timeout=timeout)
+        response.raise_for_status()
+        return response.json()
+    except (requests.exceptions.RequestException, ValueError) as exc:
+        raise RuntimeError("제품 JSON 다운로드에 실패했습니다.") from exc
 
 
 def _extract_json_ld(soup):
@@ -79,61 +94,10 @@ def _find_product_nodes(payload):
 
 
 def _split_benefits(text, limit=5):
-    """설명을 줄 단위로 쪼개서 베네핏 목록을 만듭니다."""
+    """설명을 문장 단위로 나눠 점수가 높은 베네핏 목록을 만듭니다."""
     if not text:
         return []
-    lines = _normalize_lines(text)
-    sentences = _expand_sentences(lines)
-    return _pick_benefits(sentences, limit)
-
-
-def _normalize_lines(text):
-    """줄바꿈으로 끊긴 문장을 최대한 자연스럽게 이어 붙입니다."""
-    raw_lines = [line.strip() for line in text.replace("\r", "\n").split("\n")]
-    raw_lines = [line for line in raw_lines if line]
-
-    merged = []
-    for line in raw_lines:
-        if not merged:
-            merged.append(line)
-            continue
-
-        prev = merged[-1]
-        prev_end = prev[-1] if prev else ""
-        # 이전 줄이 문장 끝(.!?)이 아니고, 다음 줄이 소문자로 시작하면 이어 붙입니다.
-        if prev_end not in ".!?" and re.match(r"^[a-z]", line):
-            merged[-1] = f"{prev} {line}"
-        else:
-            merged.append(line)
-    return merged
-
-
-def _expand_sentences(lines):
-    """긴 문장을 문장 단위로 쪼개 후보 목록을 늘립니다."""
-    sentences = []
-    for line in lines:
-        # 너무 긴 줄은 문장 단위로 분리합니다.
-        if len(line) > 140:
-            parts = re.split(r"(?<=[.!?])\s+", line)
-            sentences.extend([p.strip() for p in parts if p.strip()])
-        else:
-            sentences.append(line)
-    return sentences
-
-
-def _pick_benefits(candidates, limit):
-    """길이 기준으로 베네핏 후보를 정리합니다."""
-    cleaned = []
-    for item in candidates:
-        piece = item.strip()
-        if len(piece) < 8:
-            continue
-        if len(piece) > 160:
-            continue
-        cleaned.append(piece)
-        if len(cleaned) >= limit:
-            break
-    return cleaned
+    return extract_benefits(text, limit)
 
 
 def _normalize_image_url(url):
@@ -155,11 +119,9 @@ def _normalize_image_url(url):
     )
 
 
-def extract_product_data(html, url):
-    """HTML을 파싱해 제품 정보 구조로 정리합니다."""
-    soup = BeautifulSoup(html, "html.parser")
-
-    data = {
+def _empty_product(url):
+    """크롤러가 돌려주는 제품 정보의 기본 구조입니다."""
+    return {
         "url": url,
         "name": "",
         "description": "",
@@ -169,8 +131,66 @@ def extract_product_data(html, url):
         "sku": "",
         "benefits": [],
         "images": [],
+        "imageCandidates": [],
     }
 
+
+def _finish_product(data, image_groups, rule, probe_images):
+    """이미지 후보 선별과 베네핏 추출 등 공통 마무리 단계를 수행합니다."""
+    # 출처(JSON-LD > og:image > img 태그)를 기억해 두었다가 순위에 반영합니다.
+    candidates = []
+    for source, images in image_groups:
+        for img in images:
+            normalized = _normalize_image_url(img)
+            # 아이콘/추적 픽셀을 줄이기 위해 사이트 규칙의 도메인으로 제한합니다.
+            if not normalized:
+                continue
+            if rule["imageHosts"] and not any(host in normalized for host in rule["imageHosts"]):
+                continue
+            candidates.append((normalized, source))
+
+    data["images"] = select_images(candidates, limit=12, probe=probe_images)
+    # 변경 비교용 대표 URL 목록입니다. (프로브 실패로 images가 달라져도 변경으로 보지 않음)
+    data["imageCandidates"] = sorted({canonical_image_url(url) for url, _ in candidates})
+
+    # 설명을 기반으로 베네핏 후보를 만듭니다.
+    data["benefits"] = _split_benefits(data["description"])
+    return data
+
+
+def shop_currency(endpoint):
+    """상점 정보 JSON의 기본 통화를 읽습니다. 실패하면 빈 문자열을 돌려줍니다."""
+    currency = _shop_currencies.get(endpoint)
+    if currency:
+        return currency
+    try:
+        currency = fetch_json(endpoint).get("currency") or ""
+    except (RuntimeError, AttributeError) as exc:
+        print(f"[WARN] 상점 통화 조회 실패: {endpoint} ({exc})")
+        return ""
+    if currency:
+        _shop_currencies[endpoint] = currency
+    return currency
+
+
+def extract_product_json(payload, url, rule, probe_images=False):
+    """사이트 JSON API 응답을 제품 정보 구조로 정리합니다 (HTML 파싱 생략)."""
+    data = _empty_product(url)
+    fields = rule["parseJson"](payload)
+    images = fields.pop("images", [])
+    data.update(fields)
+    if not data["currency"] and rule.get("currencyEndpoint"):
+        data["currency"] = shop_currency(rule["currencyEndpoint"](url))
+    return _finish_product(data, [("json_ld", images)], rule, probe_images)
+
+
+def extract_product_data(html, url, probe_images=False, rule=None):
+    """HTML을 파싱해 제품 정보 구조로 정리합니다. (probe_images=True면 이미지 크기/중복을 실제로 확인)"""
+    rule = rule or find_rule(url)
+    soup = bs4.BeautifulSoup(html, "html.parser")
+
+    data = _empty_product(url)
+
     # 1) JSON-LD는 제품 메타데이터가 정리돼 있는 경우가 많습니다.
     json_ld_nodes = _extract_json_ld(soup)
     product_nodes = []
@@ -217,7 +237,8 @@ def extract_product_data(html, url):
         if tag.get("content")
     ]
 
-    img_tags = soup.find_all("img")
+    # 사이트 규칙의 선택자로 제품 영역의 img만 찾고, 없으면 문서 전체를 봅니다.
+    img_tags = select_nodes(rule, soup) or soup.find_all("img")
     img_sources = []
     for tag in img_tags:
         src = tag.get("src") or tag.get("data-src") or tag.get("data-original")
@@ -225,22 +246,7 @@ def extract_product_data(html, url):
             continue
         img_sources.append(src)
 
-    normalized_images = []
-    for img in data["images"] + og_images + img_sources:
-        normalized = _normalize_image_url(img)
-        if normalized:
-            normalized_images.append(normalized)
-
-    all_images = _unique(normalized_images)
-    filtered_images = []
-    for img in all_images:
-        # 아이콘/추적 픽셀을 줄이기 위해 도메인을 제한합니다.
-        if "cdn.shopify.com" in img or "amoremall" in img:
-            filtered_images.append(img)
-        if len(filtered_images) >= 12:
-            break
-
-    data["images"] = _unique(filtered_images)[:12]
+    image_groups = [("json_ld", data["images"]), ("og", og_images), ("img", img_sources)]
 
     # 4) 설명이 비어 있으면 일반 메타 설명을 사용합니다.
     if not data["description"]:
@@ -248,13 +254,58 @@ def extract_product_data(html, url):
         if meta_desc and meta_desc.get("content"):
             data["description"] = meta_desc["content"].strip()
 
-    # 5) 설명을 기반으로 베네핏 후보를 만듭니다.
-    data["benefits"] = _split_benefits(data["description"])
+    # 5) 이미지 선별 + 베네핏 추출
+    return _finish_product(data, image_groups, rule, probe_images)
 
-    return data
+
+def fetch_product_source(url):
+    """제품 원본을 받아 (종류, 내용, 규칙)을 돌려줍니다. 종류는 "json" 또는 "html"입니다."""
+    rule = find_rule(url)
+
+    # JSON API가 있는 사이트는 HTML을 받지도, 파싱하지도 않습니다.
+    endpoint = rule["jsonEndpoint"](url) if rule["jsonEndpoint"] else None
+    if endpoint:
+        try:
+            return "json", fetch_json(endpoint), rule
+        except RuntimeError as exc:
+            print(f"[WARN] {rule['name']} JSON 실패, HTML로 대체합니다: {exc}")
+
+    return "html", fetch_html(url), rule
+
+
+def parse_product_source(kind, source, url, rule):
+    """fetch_product_source 결과를 제품 정보 구조로 정리합니다."""
+    if kind == "json":
+        return extract_product_json(source, url, rule, probe_images=True)
+    return extract_product_data(source, url, probe_images=True, rule=rule)
 
 
 def crawl_product_page(url):
     """URL을 받아 HTML 다운로드 → 제품 정보 추출까지 한 번에 수행합니다."""
-    html = fetch_html(url)
-    return extract_product_data(html, url)
+    kind, source, rule = fetch_product_source(url)
+    return parse_product_source(kind, source, url, rule)
+
+
+def crawl_and_store(url, db_path, incremental=True):
+    """크롤링 결과를 제품 저장소에 기록하고 이전 크롤링과의 필드별 차이를 돌려줍니다.
+
+    incremental=True면 원본 해시가 같은 페이지는 파싱하지 않고 저장된 정보를 씁니다.
+    status: new(처음 저장) / changed(필드 변경) / unchanged(원본 또는 필드 동일)
+    """
+    kind, source, rule = fetch_product_source(url)
+    source_hash = content_hash(source)
+    record = get_record(db_path, url)
+
+    if incremental and record and record["sourceHash"] == source_hash:
+        touch_record(db_path, url)
+        return {"url": url, "status": "unchanged", "skipped": True, "product": record["product"], "changes": {}}
+
+    product = parse_product_source(kind, source, url, rule)
+    changes = diff_products(record["product"] if record else None, product)
+    if record is None:
+        status = "new"
+    else:
+        # 원본 HTML은 바뀌었어도(광고, 토큰 등) 비교 필드가 같으면 재생성이 필요 없습니다.
+        status = "changed" if changes else "unchanged"
+    save_record(db_path, url, source_hash, product, changed=status != "unchanged")
+    return {"url": url, "status": status, "skipped": False, "product": product, "changes": changes}
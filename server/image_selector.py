@@ -0,0 +1,221 @@
+import math
+import re
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+try:
+    from lazy_import import lazy_import, module_available
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .lazy_import import lazy_import, module_available
+
+requests = lazy_import("requests")
+
+# Pillow는 썸네일 해상도/지각 해시 계산에 사용됩니다. (설치 여부만 먼저 확인)
+PILLOW_AVAILABLE = module_available("PIL")
+Image = lazy_import("PIL.Image")
+ImageFile = lazy_import("PIL.ImageFile")
+
+# 출처별 신뢰도: JSON-LD > og:image > img 태그
+SOURCE_WEIGHTS = {"json_ld": 3.0, "og": 2.0, "img": 1.0}
+
+# 크기/버전 변형 규칙이 알려진 CDN (호스트 → 변형용 쿼리 파라미터, 같은 이미지로 취급)
+# 다른 호스트의 쿼리는 이미지 자체를 가리킬 수 있으므로 건드리지 않습니다.
+VARIANT_PARAMS = {
+    "cdn.shopify.com": frozenset(("v", "width", "height", "crop", "format", "pad_color")),
+    "imgix.net": frozenset(("w", "h", "fit", "crop", "auto", "q", "fm", "dpr")),
+}
+SHOPIFY_CDN_HOSTS = ("cdn.shopify.com",)
+# Shopify 파일명 크기 접미사: product_800x800.jpg, product_grande@2x.jpg, product_crop_center.jpg
+SHOPIFY_SIZE_RE = re.compile(
+    r"_(?:\d+x\d*|\d*x\d+|pico|icon|thumb|small|compact|medium|large|grande|original|master)"
+    r"(?:_crop_(?:top|center|bottom|left|right))?(?:@\dx)?(?=\.\w+$)"
+)
+
+# 썸네일을 따로 요청할 수 있는 CDN (호스트 → 쿼리 파라미터)
+THUMBNAIL_PARAMS = {"cdn.shopify.com": {"width": "128"}}
+# 썸네일이 없는 곳은 앞부분만 받아 헤더(해상도)를 읽습니다.
+PROBE_BYTES = 256 * 1024
+PROBE_WORKERS = 8
+MAX_PROBES = 24
+PROBE_TIMEOUT = 10
+
+# 아이콘/배지로 볼 최소 크기, 같은 사진으로 볼 해시 거리
+MIN_IMAGE_SIDE = 300
+DUPLICATE_DISTANCE = 6
+TARGET_RATIO = 1920 / 1080
+
+
+def _host_rule(host, rules):
+    """호스트(또는 상위 도메인)에 해당하는 규칙을 찾습니다."""
+    for domain, rule in rules.items():
+        if host == domain or host.endswith("." + domain):
+            return rule
+    return None
+
+
+def canonical_image_url(url):
+    """CDN 크기/버전 변형을 지운 대표 URL입니다. (중복 판단 키로만 쓰고, 다운로드는 원본 URL로 합니다)"""
+    parsed = urlparse(url)
+    host = parsed.hostname or ""
+    path = parsed.path
+    if host in SHOPIFY_CDN_HOSTS:
+        path = SHOPIFY_SIZE_RE.sub("", path)
+    query = parsed.query
+    variant_params = _host_rule(host, VARIANT_PARAMS)
+    if variant_params:
+        query = urlencode([
+            (key, value)
+            for key, value in parse_qsl(query, keep_blank_values=True)
+            if key.lower() not in variant_params
+        ])
+    return urlunparse((parsed.scheme, parsed.netloc, path, parsed.params, query, ""))
+
+
+def _thumbnail_url(url):
+    """썸네일을 지원하는 CDN이면 작은 버전 URL을 돌려줍니다."""
+    parsed = urlparse(canonical_image_url(url))
+    params = THUMBNAIL_PARAMS.get(parsed.netloc)
+    if not params:
+        return None
+    # 원본 URL의 크기 변형 파라미터는 지우고 썸네일 크기만 붙입니다.
+    query = parse_qsl(parsed.query, keep_blank_values=True) + list(params.items())
+    return urlunparse(parsed._replace(query=urlencode(query)))
+
+
+def perceptual_hash(image):
+    """64비트 dHash: 밝기 변화 방향만 비교해 크기/압축이 달라도 같은 값을 냅니다."""
+    small = image.convert("L").resize((9, 8), Image.BILINEAR)
+    pixels = small.tobytes()
+    value = 0
+    for row in range(8):
+        for col in range(8):
+            left = pixels[row * 9 + col]
+            right = pixels[row * 9 + col + 1]
+            value = (value << 1) | (1 if left > right else 0)
+    return value
+
+
+def _hamming(a, b):
+    return bin(a ^ b).count("1")
+
+
+def _total_size(headers):
+    """Content-Range(206) 또는 Content-Length(200)에서 원본 전체 크기를 읽습니다."""
+    content_range = headers.get("Content-Range", "")
+    if "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    length = headers.get("Content-Length")
+    return int(length) if length and length.isdigit() else None
+
+
+def probe_image(url):
+    """이미지 전체를 받지 않고 해상도/파일 크기/지각 해시만 알아냅니다."""
+    result = {"width": 0, "height": 0, "hash": None, "bytes": None}
+    thumb_url = _thumbnail_url(url)
+    headers = {} if thumb_url else {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+
+    try:
+        response = requests.get(thumb_url or url, headers=headers, stream=True, timeout=PROBE_TIMEOUT)
+        response.raise_for_status()
+        body = response.raw.read(PROBE_BYTES + 1, decode_content=True)
+        total = _total_size(response.headers)
+        response.close()
+    except requests.exceptions.RequestException:
+        return result
+
+    if not PILLOW_AVAILABLE:
+        return result
+
+    parser = ImageFile.Parser()
+    try:
+        parser.feed(body)
+    except Exception:
+        return result
+    image = parser.image
+    if image is None:
+        return result
+
+    result["width"], result["height"] = image.size
+    if not thumb_url:
+        result["bytes"] = total
+    # 썸네일은 비율만 원본과 같으므로 크기 점수/최소 크기 판단에서 제외합니다.
+    result["thumbnail"] = thumb_url is not None
+
+    # 전체가 들어온 작은 파일이나 썸네일만 해시를 계산합니다. (잘린 이미지는 해시가 틀어짐)
+    # 썸네일이 없는 CDN의 큰 이미지는 해시 없이 대표 URL과 크기로만 중복을 판단합니다.
+    complete = thumb_url is not None or (total is not None and total <= PROBE_BYTES)
+    if complete:
+        try:
+            result["hash"] = perceptual_hash(Image.open(BytesIO(body)))
+        except Exception:
+            pass
+    return result
+
+
+def score_candidate(candidate):
+    """출처/크기/비율로 후보 점수를 매깁니다."""
+    score = SOURCE_WEIGHTS.get(candidate["source"], 0.0)
+    width = candidate.get("width") or 0
+    height = candidate.get("height") or 0
+    if width and height:
+        if not candidate.get("thumbnail"):
+            score += 2.0 * min(width * height / (1920 * 1080), 1.0)
+        # 16:9 크롭에서 잃는 부분이 적을수록 좋습니다.
+        score += 1.0 - min(abs(math.log((width / height) / TARGET_RATIO)), 1.0)
+    return score
+
+
+def _is_duplicate(item, kept):
+    """지각 해시가 가깝거나, 해시가 없으면 해상도와 파일 크기가 모두 같은 경우 같은 이미지로 봅니다."""
+    if item.get("hash") is not None and kept.get("hash") is not None:
+        return _hamming(item["hash"], kept["hash"]) <= DUPLICATE_DISTANCE
+    if not item.get("bytes") or not item.get("width"):
+        return False
+    return (item["width"], item["height"], item["bytes"]) == (
+        kept.get("width"), kept.get("height"), kept.get("bytes"),
+    )
+
+
+def select_images(candidates, limit=12, probe=False):
+    """(url, source) 후보 목록에서 변형/중복을 지우고 점수순으로 고릅니다."""
+    merged = {}
+    for order, (url, source) in enumerate(candidates):
+        key = canonical_image_url(url)
+        current = merged.get(key)
+        if current is None:
+            merged[key] = {"url": url, "source": source, "order": order}
+        elif SOURCE_WEIGHTS.get(source, 0) > SOURCE_WEIGHTS.get(current["source"], 0):
+            # 더 신뢰도 높은 출처의 URL을 그대로 씁니다.
+            current["url"] = url
+            current["source"] = source
+
+    unique = sorted(merged.values(), key=lambda item: item["order"])
+
+    if probe and unique:
+        probed = unique[:MAX_PROBES]
+        with ThreadPoolExecutor(max_workers=PROBE_WORKERS) as pool:
+            for item, info in zip(probed, pool.map(lambda item: probe_image(item["url"]), probed)):
+                item.update(info)
+        unique = probed
+        # 실제로 작다고 확인된 이미지(아이콘/배지)는 버립니다.
+        unique = [
+            item for item in unique
+            if item.get("thumbnail") or not item.get("width")
+            or min(item["width"], item["height"]) >= MIN_IMAGE_SIDE
+        ]
+
+    for item in unique:
+        item["score"] = score_candidate(item)
+    ranked = sorted(unique, key=lambda item: (-item["score"], item["order"]))
+
+    selected = []
+    for item in ranked:
+        if any(_is_duplicate(item, kept) for kept in selected):
+            continue
+        selected.append(item)
+        if len(selected) >= limit:
+            break
+    return [item["url"] for item in selected]
@@ -0,0 +1,70 @@
+import importlib
+import importlib.util
+import threading
+import time
+
+# 같은 이름은 모든 모듈이 같은 지연 모듈 객체를 공유합니다.
+_lazy_modules = {}
+_lazy_lock = threading.Lock()
+
+
+class LazyModule:
+    """처음 속성에 접근할 때 실제 모듈을 import 하는 대리 객체입니다."""
+
+    def __init__(self, name):
+        object.__setattr__(self, "_name", name)
+        object.__setattr__(self, "_module", None)
+        object.__setattr__(self, "_lock", threading.Lock())
+
+    def _load(self):
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    object.__setattr__(self, "_module", importlib.import_module(self._name))
+        return self._module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    # monkeypatch 등으로 속성을 바꾸면 실제 모듈에 반영합니다.
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __delattr__(self, attr):
+        delattr(self._load(), attr)
+
+    def __repr__(self):
+        return f"<lazy module {self._name!r}>"
+
+
+def lazy_import(name):
+    """모듈을 지연 import 합니다. 실제 로드는 첫 속성 접근 시점입니다."""
+    with _lazy_lock:
+        module = _lazy_modules.get(name)
+        if module is None:
+            module = _lazy_modules[name] = LazyModule(name)
+        return module
+
+
+def module_available(name):
+    """모듈을 import 하지 않고 설치 여부만 확인합니다."""
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def warm_up(names):
+    """무거운 모듈을 백그라운드 스레드에서 미리 import 합니다 (첫 요청 지연 감소)."""
+    def run():
+        started = time.perf_counter()
+        for name in names:
+            try:
+                lazy_import(name)._load()
+            except ImportError as exc:
+                print(f"[WARN] Warm-up import 실패: {name} ({exc})")
+        print(f"[INFO] Warm-up 완료: {time.perf_counter() - started:.2f}s")
+
+    thread = threading.Thread(target=run, name="import-warm-up", daemon=True)
+    thread.start()
+    return thread
@@ -1,19 +1,45 @@
+import base64
+import hashlib
+import json
 import os
+import threading
 import time
-from datetime import datetime, timedelta
+import uuid
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
-import requests
+try:
+    from lazy_import import lazy_import, module_available
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .lazy_import import lazy_import, module_available
+
+# 네트워크/이미지 모듈은 첫 다운로드 때 로드합니다 (서버 시작 시간 단축).
+requests = lazy_import("requests")
+urllib3_exceptions = lazy_import("urllib3.exceptions")
 
 ALLOWED_SCHEMES = ("http://", "https://")
 MAX_DOWNLOAD_BYTES = 200 * 1024 * 1024
 
-# Pillow는 이미지 리사이즈/크롭에 사용됩니다.
-try:
-    from PIL import Image
-    PILLOW_AVAILABLE = True
-except ImportError:
-    PILLOW_AVAILABLE = False
+# 한 번에 읽는 크기는 전송 속도에 맞춰 MIN~MAX 사이에서 조절합니다.
+MIN_CHUNK_BYTES = 64 * 1024
+MAX_CHUNK_BYTES = 4 * 1024 * 1024
+# 이보다 작은 파일은 나눠 받을 이득이 없어 한 연결로 받습니다.
+MIN_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_SEGMENTS = 4
+STATE_SAVE_INTERVAL = 0.5
+REQUEST_TIMEOUT = 30
+# 임시 폴더 정리는 요청마다 호출돼도 이 간격(초)에 한 번만 실제로 실행합니다.
+CLEANUP_INTERVAL = 10 * 60
+# 쓰는 중인 파일 표시: 잠금 파일의 PID가 종료됐거나, PID를 읽을 수 없는 잠금이 이보다 오래되면 무시합니다.
+LOCK_STALE_SECONDS = 6 * 60 * 60
+PROCESS_QUERY_LIMITED_INFORMATION = 0x1000
+STILL_ACTIVE = 259
+
+# Pillow는 이미지 리사이즈/크롭에 사용됩니다. (설치 여부만 먼저 확인)
+PILLOW_AVAILABLE = module_available("PIL")
+Image = lazy_import("PIL.Image")
 
 
 def ensure_temp_dir(base_dir):
@@ -23,22 +49,378 @@ def ensure_temp_dir(base_dir):
     return temp_dir
 
 
-def cleanup_old_images(temp_dir, hours=24):
-    """오래된 임시 파일을 정리합니다(기본 24시간)."""
+_cleanup_lock = threading.Lock()
+_last_cleanup = {}
+# 이 프로세스에서 쓰는 중인 파일 경로
+_active_paths = set()
+_active_lock = threading.Lock()
+
+
+def unique_filename(prefix, extension):
+    """동시 요청/다른 프로세스와 겹치지 않는 파일 이름을 만듭니다."""
+    return f"{prefix}_{time.strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex[:12]}{extension}"
+
+
+@contextmanager
+def writing(path):
+    """파일을 쓰는 동안 정리 대상에서 빼 둡니다."""
+    with _active_lock:
+        _active_paths.add(os.path.abspath(path))
+    try:
+        yield path
+    finally:
+        with _active_lock:
+            _active_paths.discard(os.path.abspath(path))
+
+
+@contextmanager
+def atomic_write(path):
+    """임시 이름으로 쓴 뒤 os.replace로 옮깁니다. 실패하면 임시 파일을 지웁니다."""
+    directory, name = os.path.split(path)
+    tmp_path = os.path.join(directory, f".{name}.{uuid.uuid4().hex[:8]}.tmp")
+    with writing(tmp_path):
+        try:
+            yield tmp_path
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _pid_alive(pid):
+    """해당 PID의 프로세스가 아직 실행 중인지 확인합니다."""
+    if pid <= 0:
+        return False
+    if os.name == "nt":
+        # Windows의 os.kill(pid, 0)은 프로세스를 종료시키므로 상태만 조회합니다.
+        import ctypes
+        kernel32 = ctypes.windll.kernel32
+        handle = kernel32.OpenProcess(PROCESS_QUERY_LIMITED_INFORMATION, False, pid)
+        if not handle:
+            return False
+        exit_code = ctypes.c_ulong()
+        ok = kernel32.GetExitCodeProcess(handle, ctypes.byref(exit_code))
+        kernel32.CloseHandle(handle)
+        return bool(ok) and exit_code.value == STILL_ACTIVE
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _lock_is_live(lock_path, now):
+    """잠금을 만든 프로세스가 살아 있으면 유효합니다. (PID를 읽을 수 없으면 수정 시각으로 판단)"""
     try:
-        now = datetime.now()
+        with open(lock_path, "r", encoding="ascii") as handle:
+            pid = handle.read().strip()
+        if pid.isdigit():
+            return _pid_alive(int(pid))
+        return now - os.path.getmtime(lock_path) < LOCK_STALE_SECONDS
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
+def _in_progress(filepath, now):
+    """다른 요청(또는 다른 프로세스)이 아직 쓰고 있는 파일인지 확인합니다."""
+    with _active_lock:
+        if os.path.abspath(filepath) in _active_paths:
+            return True
+    if filepath.endswith(".lock"):
+        return _lock_is_live(filepath, now)
+    if filepath.endswith((".part", ".part.json")):
+        # 이어받기 파일은 같은 이름의 잠금 파일로 다른 프로세스의 사용 여부를 판단합니다.
+        base = filepath[:-len(".json")] if filepath.endswith(".json") else filepath
+        return _lock_is_live(base + ".lock", now)
+    return False
+
+
+def cleanup_old_images(temp_dir, hours=24, min_interval=CLEANUP_INTERVAL):
+    """오래된 임시 파일을 정리합니다(기본 24시간). 쓰는 중인 파일은 건드리지 않습니다."""
+    now = time.time()
+    # 여러 요청이 동시에 호출해도 한 스레드만, min_interval에 한 번만 실행합니다.
+    if not _cleanup_lock.acquire(blocking=False):
+        return
+    try:
+        if now - _last_cleanup.get(temp_dir, 0) < min_interval:
+            return
+        _last_cleanup[temp_dir] = now
         for filename in os.listdir(temp_dir):
             filepath = os.path.join(temp_dir, filename)
-            if os.path.isfile(filepath):
-                file_modified = datetime.fromtimestamp(os.path.getmtime(filepath))
-                if now - file_modified > timedelta(hours=hours):
-                    os.remove(filepath)
-                    print(f"[INFO] Removed old temp file: {filename}")
+            try:
+                if not os.path.isfile(filepath) or now - os.path.getmtime(filepath) <= hours * 3600:
+                    continue
+                if _in_progress(filepath, now):
+                    continue
+                os.remove(filepath)
+                print(f"[INFO] Removed old temp file: {filename}")
+            except FileNotFoundError:
+                # 다른 프로세스가 먼저 지웠거나 이름을 바꾼 파일
+                continue
+            except OSError as exc:
+                print(f"[WARN] Failed to remove temp file {filename}: {exc}")
     except Exception as exc:
         print(f"[ERROR] Failed to cleanup temp files: {exc}")
+    finally:
+        _cleanup_lock.release()
+
+
+class AdaptiveChunker:
+    """읽기 속도를 보고 다음 청크 크기를 키우거나 줄입니다."""
+
+    def __init__(self, size=MIN_CHUNK_BYTES):
+        self.size = size
+
+    def update(self, elapsed):
+        # 청크가 금방 채워지면 키우고, 오래 걸리면 줄입니다.
+        if elapsed < 0.05:
+            self.size = min(self.size * 2, MAX_CHUNK_BYTES)
+        elif elapsed > 0.5:
+            self.size = max(self.size // 2, MIN_CHUNK_BYTES)
+
+
+def _iter_adaptive(response):
+    """응답 본문을 적응형 청크 크기로 읽습니다."""
+    chunker = AdaptiveChunker()
+    raw = getattr(response, "raw", None)
+    if raw is None or not hasattr(raw, "read"):
+        # requests.Response가 아닌 경우(테스트 더블 등)는 iter_content를 사용합니다.
+        for chunk in response.iter_content(chunk_size=chunker.size):
+            if chunk:
+                yield chunk
+        return
+
+    while True:
+        started = time.monotonic()
+        try:
+            chunk = raw.read(chunker.size, decode_content=True)
+        except urllib3_exceptions.ProtocolError as exc:
+            # iter_content와 같은 예외로 맞춰 호출하는 쪽이 한 가지만 처리하게 합니다.
+            raise requests.exceptions.ChunkedEncodingError(exc) from exc
+        if not chunk:
+            break
+        chunker.update(time.monotonic() - started)
+        yield chunk
+
+
+def _partial_paths(url, dest_path):
+    """URL 기준으로 이어받기용 임시 파일/상태 파일 경로를 정합니다."""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    part_path = os.path.join(os.path.dirname(dest_path), f"video_{digest}.part")
+    return part_path, part_path + ".json"
+
+
+def _claim(lock_path, retry=True):
+    """이어받기 파일을 한 요청만 쓰도록 잠금 파일을 만듭니다 (프로세스 간에도 유효)."""
+    try:
+        fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        if not retry or _lock_is_live(lock_path, time.time()):
+            return False
+        # 비정상 종료(프로세스 없음)로 남은 잠금은 지우고 한 번만 다시 시도합니다.
+        try:
+            os.remove(lock_path)
+        except FileNotFoundError:
+            pass
+        return _claim(lock_path, retry=False)
+    with os.fdopen(fd, "w") as handle:
+        handle.write(str(os.getpid()))
+    return True
 
 
-def download_and_prepare_media(url, media_type, temp_dir):
+class RangeIgnoredError(RuntimeError):
+    """Accept-Ranges를 광고했지만 Range 요청에 전체 본문(200)으로 응답한 경우입니다."""
+
+
+def _load_state(state_path, identity):
+    """이전 다운로드 상태가 같은 파일(URL/크기/ETag)이면 불러옵니다."""
+    try:
+        with open(state_path, "r", encoding="utf-8") as handle:
+            state = json.load(handle)
+    except (OSError, ValueError):
+        return {}
+    if state.get("identity") != identity:
+        return {}
+    return {int(key): value for key, value in state.get("done", {}).items()}
+
+
+def _save_state(state_path, identity, done):
+    """세그먼트별 진행 상황을 원자적으로 저장합니다."""
+    tmp_path = state_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as handle:
+        json.dump({"identity": identity, "done": done}, handle)
+    os.replace(tmp_path, state_path)
+
+
+def _plan_segments(total, segments):
+    """전체 크기를 [start, end] 바이트 구간 목록으로 나눕니다."""
+    count = max(1, min(segments, total // MIN_SEGMENT_BYTES))
+    size = -(-total // count)
+    return [(start, min(start + size, total) - 1) for start in range(0, total, size)]
+
+
+def _file_digest(path, algorithm):
+    """파일 전체의 해시를 계산합니다."""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(MAX_CHUNK_BYTES), b""):
+            digest.update(block)
+    return digest
+
+
+def _verify(part_path, expected_size, expected_sha256, content_md5):
+    """크기와 체크섬(sha256 또는 Content-MD5)을 확인합니다."""
+    actual_size = os.path.getsize(part_path)
+    if expected_size is not None and actual_size != expected_size:
+        raise RuntimeError(f"다운로드 크기가 맞지 않습니다: {actual_size} != {expected_size}")
+    if expected_sha256:
+        if _file_digest(part_path, "sha256").hexdigest() != expected_sha256.lower():
+            raise RuntimeError("다운로드 파일의 SHA-256 체크섬이 맞지 않습니다.")
+    elif content_md5:
+        if base64.b64encode(_file_digest(part_path, "md5").digest()).decode("ascii") != content_md5:
+            raise RuntimeError("다운로드 파일의 Content-MD5 체크섬이 맞지 않습니다.")
+
+
+def _download_ranges(url, part_path, state_path, identity, total, segments):
+    """Range 요청으로 구간을 병렬로 받아 미리 할당한 파일에 씁니다."""
+    done = _load_state(state_path, identity)
+    if not done or not os.path.exists(part_path) or os.path.getsize(part_path) != total:
+        done = {}
+        with open(part_path, "wb") as handle:
+            handle.truncate(total)
+
+    plan = _plan_segments(total, segments)
+    lock = threading.Lock()
+    last_saved = [0.0]
+
+    def record(index, written, force=False):
+        with lock:
+            done[index] = written
+            now = time.monotonic()
+            if force or now - last_saved[0] >= STATE_SAVE_INTERVAL:
+                _save_state(state_path, identity, done)
+                last_saved[0] = now
+
+    def fetch_segment(index):
+        start, end = plan[index]
+        written = done.get(index, 0)
+        if start + written > end:
+            return
+        headers = {"Range": f"bytes={start + written}-{end}"}
+        with requests.get(url, headers=headers, stream=True, timeout=REQUEST_TIMEOUT) as response:
+            response.raise_for_status()
+            if response.status_code != 206:
+                raise RangeIgnoredError("서버가 Range 요청을 처리하지 않았습니다.")
+            with open(part_path, "r+b") as handle:
+                handle.seek(start + written)
+                for chunk in _iter_adaptive(response):
+                    chunk = chunk[:end - start + 1 - written]
+                    handle.write(chunk)
+                    written += len(chunk)
+                    record(index, written)
+                    if start + written > end:
+                        break
+        if start + written <= end:
+            raise RuntimeError(f"세그먼트 {index} 다운로드가 중간에 끊겼습니다.")
+        record(index, written, force=True)
+
+    try:
+        with ThreadPoolExecutor(max_workers=len(plan)) as pool:
+            for future in [pool.submit(fetch_segment, index) for index in range(len(plan))]:
+                future.result()
+    finally:
+        # 실패하더라도 받은 구간은 기록해 두어 다음 호출에서 이어받습니다.
+        with lock:
+            _save_state(state_path, identity, done)
+
+
+def _download_stream(response, part_path, max_bytes):
+    """Range를 지원하지 않는 서버는 한 연결로 순차 다운로드합니다."""
+    total = 0
+    with open(part_path, "wb") as handle:
+        for chunk in _iter_adaptive(response):
+            total += len(chunk)
+            if total > max_bytes:
+                raise RuntimeError("다운로드 파일이 너무 큽니다.")
+            handle.write(chunk)
+
+
+def fetch_video(url, dest_path, response, max_bytes, expected_sha256=None, segments=DEFAULT_SEGMENTS):
+    """영상을 받아 dest_path에 저장합니다 (Range 병렬 다운로드/이어받기/검증)."""
+    part_path, state_path = _partial_paths(url, dest_path)
+    lock_path = part_path + ".lock"
+    if not _claim(lock_path):
+        # 같은 URL을 다른 요청이 받는 중이면 이어받기 없이 별도 임시 파일로 받습니다.
+        lock_path = None
+        part_path = os.path.join(
+            os.path.dirname(dest_path), f".{os.path.basename(dest_path)}.{uuid.uuid4().hex[:8]}.part"
+        )
+        state_path = part_path + ".json"
+
+    try:
+        with writing(part_path), writing(state_path):
+            _fetch_to_part(url, part_path, state_path, response, max_bytes, expected_sha256, segments)
+            os.replace(part_path, dest_path)
+        if os.path.exists(state_path):
+            os.remove(state_path)
+    except BaseException:
+        # 별도 임시 파일은 이어받을 수 없으므로 바로 지웁니다.
+        if lock_path is None:
+            for path in (part_path, state_path):
+                if os.path.exists(path):
+                    os.remove(path)
+        raise
+    finally:
+        if lock_path and os.path.exists(lock_path):
+            os.remove(lock_path)
+    return dest_path
+
+
+def _fetch_to_part(url, part_path, state_path, response, max_bytes, expected_sha256, segments):
+    """part_path에 내려받고 크기/체크섬을 확인합니다."""
+    headers = response.headers
+    content_length = headers.get("Content-Length")
+    total = int(content_length) if content_length else None
+    supports_ranges = headers.get("Accept-Ranges", "").lower() == "bytes"
+
+    if supports_ranges and total and total >= MIN_SEGMENT_BYTES:
+        # 첫 응답은 헤더 확인용으로만 쓰고, 본문은 구간별 요청으로 받습니다.
+        close = getattr(response, "close", None)
+        if close:
+            close()
+        identity = {
+            "url": url,
+            "size": total,
+            "etag": headers.get("ETag", ""),
+            "lastModified": headers.get("Last-Modified", ""),
+        }
+        try:
+            _download_ranges(url, part_path, state_path, identity, total, segments)
+        except RangeIgnoredError:
+            # 구간 요청이 무시되면 새 GET 한 번으로 순차 다운로드합니다. (이어받기 상태는 버림)
+            print(f"[WARN] Range 요청이 무시되어 순차 다운로드로 전환합니다: {url}")
+            if os.path.exists(state_path):
+                os.remove(state_path)
+            with requests.get(url, stream=True, timeout=REQUEST_TIMEOUT) as fresh:
+                fresh.raise_for_status()
+                _download_stream(fresh, part_path, max_bytes)
+    else:
+        _download_stream(response, part_path, max_bytes)
+
+    try:
+        _verify(part_path, total, expected_sha256, headers.get("Content-MD5"))
+    except RuntimeError:
+        # 손상된 파일로 이어받지 않도록 임시 파일을 지웁니다.
+        for path in (part_path, state_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+
+
+def download_and_prepare_media(url, media_type, temp_dir, expected_sha256=None):
     """외부 URL에서 미디어를 받아 로컬에 저장하고, 이미지면 1920x1080으로 정리합니다."""
     if not url or not isinstance(url, str):
         raise ValueError("URL이 비어 있습니다.")
@@ -66,8 +448,6 @@ def download_and_prepare_media(url, media_type, temp_dir):
     if content_length and int(content_length) > MAX_DOWNLOAD_BYTES:
         raise RuntimeError("다운로드 파일이 너무 큽니다.")
 
-    timestamp = int(time.time())
-
     if media_type == "image":
         if not PILLOW_AVAILABLE:
             raise Exception("Pillow is required. Run: pip install pillow")
@@ -95,23 +475,21 @@ def download_and_prepare_media(url, media_type, temp_dir):
         top = (new_height - 1080) // 2
         img = img.crop((left, top, left + 1920, top + 1080))
 
-        filename = f"downloaded_{timestamp}.jpg"
+        filename = unique_filename("downloaded", ".jpg")
         filepath = os.path.join(temp_dir, filename)
-        img.save(filepath, "JPEG", quality=95)
+        # AE가 반쯤 쓰인 파일을 읽지 않도록 임시 이름으로 저장한 뒤 옮깁니다.
+        with atomic_write(filepath) as tmp_path:
+            img.save(tmp_path, "JPEG", quality=95)
         print(f"[INFO] Image saved: {filename}")
     else:
-        # 영상은 그대로 파일로 저장합니다.
-        filename = f"downloaded_{timestamp}.mp4"
+        # 영상은 그대로 파일로 저장합니다. (Range 지원 시 병렬 구간 다운로드 + 이어받기)
+        filename = unique_filename("downloaded", ".mp4")
         filepath = os.path.join(temp_dir, filename)
 
-        total = 0
-        with open(filepath, "wb") as handle:
-            for chunk in response.iter_content(chunk_size=8192):
-                if chunk:
-                    total += len(chunk)
-                    if total > MAX_DOWNLOAD_BYTES:
-                        raise RuntimeError("다운로드 파일이 너무 큽니다.")
-                    handle.write(chunk)
+        try:
+            fetch_video(url, filepath, response, MAX_DOWNLOAD_BYTES, expected_sha256=expected_sha256)
+        except requests.exceptions.RequestException as exc:
+            raise RuntimeError("영상 다운로드 중 연결이 끊겼습니다. 다시 요청하면 이어받습니다.") from exc
         print(f"[INFO] Video saved: {filename}")
 
     return filename, filepath
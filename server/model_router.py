@@ -0,0 +1,50 @@
+import os
+
+
+# 가벼운 대화(질문/확인)는 빠른 모델, 코드 생성은 품질이 좋은 모델을 씁니다.
+DEFAULT_FAST_MODEL = "gemini-2.0-flash-lite"
+DEFAULT_CODE_MODEL = "gemini-2.0-flash-exp"
+# 프롬프트가 이 글자 수를 넘으면 대화 턴이어도 코드용 모델로 보냅니다.
+DEFAULT_LONG_PROMPT_CHARS = 12000
+
+# 이 상태에서는 보통 추가 질문(clarification)이 돌아옵니다.
+FAST_STATES = ("idle", "clarifying")
+
+
+def load_routing_config(env=None):
+    """환경 변수에서 배포별 모델 라우팅 설정을 읽습니다."""
+    env = os.environ if env is None else env
+
+    try:
+        long_prompt_chars = int(env.get("GEMINI_LONG_PROMPT_CHARS") or DEFAULT_LONG_PROMPT_CHARS)
+    except ValueError:
+        long_prompt_chars = DEFAULT_LONG_PROMPT_CHARS
+
+    return {
+        "fast": env.get("GEMINI_FAST_MODEL") or DEFAULT_FAST_MODEL,
+        "code": env.get("GEMINI_CODE_MODEL") or DEFAULT_CODE_MODEL,
+        "long_prompt_chars": long_prompt_chars,
+    }
+
+
+def route_model(state="idle", response_type=None, prompt_size=0, config=None):
+    """대화 상태/기대 응답/프롬프트 크기로 사용할 모델 등급과 이유를 정합니다."""
+    config = config or load_routing_config()
+
+    if response_type == "code":
+        return "code", "code response expected"
+    if prompt_size >= config["long_prompt_chars"]:
+        return "code", "long prompt"
+    if state not in FAST_STATES:
+        # confirming 상태에서는 사용자가 승인하면 곧바로 코드가 나옵니다.
+        return "code", f"state={state}"
+    return "fast", f"state={state}"
+
+
+def select_model(state="idle", response_type=None, prompt_size=0, config=None):
+    """요청에 맞는 Gemini 모델 이름을 고르고, 어떤 모델을 썼는지 로그로 남깁니다."""
+    config = config or load_routing_config()
+    tier, reason = route_model(state, response_type, prompt_size, config)
+    model_name = config[tier]
+    print(f"[INFO] Model route: {model_name} (tier={tier}, {reason}, prompt_chars={prompt_size})")
+    return model_name
@@ -0,0 +1,158 @@
+import re
+import threading
+from collections import OrderedDict
+
+try:
+    from product_store import content_hash, load_context, save_context
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .product_store import content_hash, load_context, save_context
+
+# docs/template-spec.md의 텍스트/미디어 슬롯입니다.
+TEXT_SLOTS = ("title", "benefit_1", "benefit_2", "usage", "cta")
+MEDIA_SLOTS = ("hero", "benefit_media_1", "benefit_media_2", "texture", "cta_media")
+# 미디어 슬롯 → 기본으로 쓸 제품 이미지 순번 (이미지가 부족하면 앞에서부터 다시 씁니다)
+MEDIA_SLOT_ORDER = {"hero": 0, "benefit_media_1": 1, "benefit_media_2": 2, "texture": 3, "cta_media": 0}
+# 컨텍스트 블록이 참조하는 제품 필드 (이 필드가 같으면 같은 블록입니다)
+CONTEXT_FIELDS = ("name", "brand", "price", "currency", "benefits", "images", "description")
+
+MAX_CONTEXTS = 256
+MAX_BENEFIT_CHARS = 80
+MAX_USAGE_KEYWORDS = 4
+
+# 사용감/질감 키워드 (usage 슬롯용)
+USAGE_RE = re.compile(
+    r"lightweight|non[- ]greasy|non[- ]sticky|silky|velvety|creamy|watery|gel|balm|"
+    r"fast[- ]absorbing|fresh|matte|dewy|smooth|"
+    r"가벼운|가볍게|산뜻|촉촉|쫀쫀|부드러운|부드럽게|끈적임 없|흡수|젤|크림|밤|워터리|매끈|보송|물광|광채",
+    re.IGNORECASE,
+)
+WHITESPACE_RE = re.compile(r"\s+")
+
+_contexts = OrderedDict()
+_contexts_lock = threading.Lock()
+
+
+def _clean(text):
+    """공백을 정리하고 끝 마침표를 지웁니다 (화면 텍스트용)."""
+    return WHITESPACE_RE.sub(" ", text or "").strip().rstrip(".。")
+
+
+def _shorten(text, limit=MAX_BENEFIT_CHARS):
+    if len(text) <= limit:
+        return text
+    return text[:limit - 1].rstrip() + "…"
+
+
+def context_ref(product, media=None):
+    """템플릿에 필요한 필드와 확정된 미디어 슬롯으로 참조 키를 만듭니다.
+
+    미디어 경로가 다르면 블록 내용도 다르므로 다른 키가 됩니다.
+    """
+    fields = {field: product.get(field) for field in CONTEXT_FIELDS}
+    fields["media"] = _media_slots(product.get("images") or [], media)
+    return content_hash(fields)[:16]
+
+
+def _usage_keywords(product):
+    """설명/베네핏에서 사용감 키워드를 중복 없이 뽑습니다."""
+    text = " ".join([product.get("description") or ""] + list(product.get("benefits") or []))
+    keywords = []
+    for match in USAGE_RE.finditer(text):
+        keyword = match.group(0).lower()
+        if keyword not in keywords:
+            keywords.append(keyword)
+        if len(keywords) >= MAX_USAGE_KEYWORDS:
+            break
+    return keywords
+
+
+def _media_slots(images, media=None):
+    """미디어 슬롯별 경로를 정합니다. media로 받은 값(준비된 로컬 경로)이 우선입니다."""
+    slots = {}
+    for slot in MEDIA_SLOTS:
+        if media and media.get(slot):
+            slots[slot] = media[slot]
+        elif images:
+            slots[slot] = images[MEDIA_SLOT_ORDER[slot] % len(images)]
+        else:
+            slots[slot] = ""
+    return slots
+
+
+def build_product_context(product, media=None):
+    """제품 정보를 템플릿 슬롯에 필요한 필드만 담은 컨텍스트로 정리합니다."""
+    benefits = [_shorten(_clean(item)) for item in product.get("benefits") or [] if _clean(item)]
+    name = _clean(product.get("name"))
+    brand = _clean(product.get("brand"))
+    price = _clean(product.get("price"))
+
+    slots = {
+        # brand가 이름에 이미 들어 있으면 반복하지 않습니다.
+        "title": name if not brand or brand.lower() in name.lower() else f"{brand} {name}",
+        "benefit_1": benefits[0] if benefits else "",
+        "benefit_2": benefits[1] if len(benefits) > 1 else "",
+        "usage": ", ".join(_usage_keywords(product)),
+        "cta": f"{price} {product.get('currency') or ''}".strip() if price else "",
+    }
+    return {
+        "ref": context_ref(product, media),
+        "slots": slots,
+        "media": _media_slots(product.get("images") or [], media),
+        "extraBenefits": benefits[2:],
+    }
+
+
+def render_context_block(context):
+    """프롬프트에 붙일 고정 형식 텍스트 블록입니다. (같은 제품·미디어면 바이트 단위로 같음)"""
+    lines = [f"[Product {context['ref']}] template slot sources (empty = write your own)"]
+    for slot in TEXT_SLOTS:
+        lines.append(f"{slot}: {context['slots'][slot]}")
+    if context["extraBenefits"]:
+        lines.append(f"other_benefits: {' | '.join(context['extraBenefits'])}")
+    for slot in MEDIA_SLOTS:
+        lines.append(f"media.{slot}: {context['media'][slot]}")
+    return "\n".join(lines)
+
+
+def _remember(ref, context):
+    with _contexts_lock:
+        _contexts[ref] = context
+        _contexts.move_to_end(ref)
+        while len(_contexts) > MAX_CONTEXTS:
+            _contexts.popitem(last=False)
+
+
+def register_product_context(product, media=None, db_path=None):
+    """제품 컨텍스트를 한 번만 만들어 캐시하고, 참조 키와 함께 돌려줍니다.
+
+    db_path를 주면 저장소에도 기록해 다른 워커 프로세스에서도 같은 ref를 찾을 수 있습니다.
+    """
+    ref = context_ref(product, media)
+    with _contexts_lock:
+        cached = _contexts.get(ref)
+        if cached is not None:
+            _contexts.move_to_end(ref)
+            return cached
+
+    context = build_product_context(product, media)
+    context["block"] = render_context_block(context)
+    if db_path:
+        save_context(db_path, ref, context)
+    _remember(ref, context)
+    return context
+
+
+def get_product_context(ref, db_path=None):
+    """참조 키로 캐시된 컨텍스트를 찾습니다. 메모리에 없으면 저장소를 확인합니다 (없으면 None)."""
+    with _contexts_lock:
+        context = _contexts.get(ref)
+        if context is not None:
+            _contexts.move_to_end(ref)
+            return context
+    if not db_path:
+        return None
+    context = load_context(db_path, ref)
+    if context is not None:
+        _remember(ref, context)
+    return context
@@ -0,0 +1,160 @@
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from contextlib import closing
+
+# 영상 재생성이 필요한지 판단하는 필드입니다.
+DIFF_FIELDS = ("name", "price", "benefits", "images")
+# 목록 필드는 추가/삭제된 항목만 보고합니다.
+LIST_FIELDS = ("benefits", "images")
+# 비교할 때 대신 쓰는 필드입니다. images는 이미지 프로브 결과(타임아웃 등)에 따라 달라지므로
+# 프로브 전 후보의 대표 URL 목록(imageCandidates)으로 비교합니다.
+DIFF_SOURCES = {"images": "imageCandidates"}
+DB_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    url TEXT PRIMARY KEY,
+    source_hash TEXT NOT NULL,
+    product_hash TEXT NOT NULL,
+    product_json TEXT NOT NULL,
+    crawled_at REAL NOT NULL,
+    changed_at REAL NOT NULL
+)
+"""
+# 멀티 프로세스로 실행해도 다른 워커가 만든 productRef를 찾을 수 있도록 저장합니다.
+CONTEXT_SCHEMA = """
+CREATE TABLE IF NOT EXISTS product_contexts (
+    ref TEXT PRIMARY KEY,
+    context_json TEXT NOT NULL,
+    created_at REAL NOT NULL
+)
+"""
+
+
+def default_db_path(base_dir):
+    """제품 저장소 경로 (PRODUCT_DB_PATH 환경 변수 우선)."""
+    return os.environ.get("PRODUCT_DB_PATH") or os.path.join(base_dir, "products.db")
+
+
+def _connect(db_path):
+    """요청마다 새 연결을 엽니다. (스레드 간 연결 공유 없음)"""
+    directory = os.path.dirname(os.path.abspath(db_path))
+    os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=DB_TIMEOUT)
+    # WAL 모드는 읽기와 쓰기가 서로 막지 않습니다.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute(SCHEMA)
+    conn.execute(CONTEXT_SCHEMA)
+    return conn
+
+
+def content_hash(text):
+    """원본(HTML/JSON) 내용 해시입니다."""
+    if not isinstance(text, str):
+        text = json.dumps(text, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _diff_source(field, *products):
+    """비교에 쓸 필드 이름입니다. 대체 필드는 모든 제품 정보에 있을 때만 씁니다 (이전 레코드 호환)."""
+    source = DIFF_SOURCES.get(field)
+    if source and all(source in product for product in products):
+        return source
+    return field
+
+
+def product_hash(product):
+    """제품 정보 중 비교 대상 필드만으로 해시를 만듭니다."""
+    return content_hash({field: product.get(_diff_source(field, product)) for field in DIFF_FIELDS})
+
+
+def diff_products(old, new):
+    """이전/현재 제품 정보의 필드별 변경 내용을 돌려줍니다 (변경 없으면 빈 dict)."""
+    old = old or {}
+    changes = {}
+    for field in DIFF_FIELDS:
+        source = _diff_source(field, old, new)
+        before = old.get(source)
+        after = new.get(source)
+        if field in LIST_FIELDS:
+            before = before or []
+            after = after or []
+            added = [item for item in after if item not in before]
+            removed = [item for item in before if item not in after]
+            if added or removed:
+                changes[field] = {"added": added, "removed": removed}
+        elif (before or "") != (after or ""):
+            changes[field] = {"old": before, "new": after}
+    # 가격은 통화가 바뀐 경우도 함께 보여줍니다.
+    if "price" in changes and old.get("currency") != new.get("currency"):
+        changes["price"]["currency"] = {"old": old.get("currency"), "new": new.get("currency")}
+    return changes
+
+
+def get_record(db_path, url):
+    """저장된 제품 레코드를 돌려줍니다 (없으면 None)."""
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute(
+            "SELECT source_hash, product_hash, product_json, crawled_at, changed_at "
+            "FROM products WHERE url = ?",
+            (url,),
+        ).fetchone()
+    if row is None:
+        return None
+    return {
+        "url": url,
+        "sourceHash": row[0],
+        "productHash": row[1],
+        "product": json.loads(row[2]),
+        "crawledAt": row[3],
+        "changedAt": row[4],
+    }
+
+
+def list_urls(db_path):
+    """저장된 모든 제품 URL을 돌려줍니다."""
+    with closing(_connect(db_path)) as conn:
+        return [row[0] for row in conn.execute("SELECT url FROM products ORDER BY url")]
+
+
+def touch_record(db_path, url):
+    """원본이 그대로인 제품의 마지막 확인 시각만 갱신합니다."""
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute("UPDATE products SET crawled_at = ? WHERE url = ?", (time.time(), url))
+
+
+def save_record(db_path, url, source_hash, product, changed):
+    """제품 레코드를 저장(또는 갱신)합니다. changed=False면 변경 시각을 유지합니다."""
+    now = time.time()
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute(
+            "INSERT INTO products (url, source_hash, product_hash, product_json, crawled_at, changed_at) "
+            "VALUES (?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(url) DO UPDATE SET "
+            "source_hash = excluded.source_hash, product_hash = excluded.product_hash, "
+            "product_json = excluded.product_json, crawled_at = excluded.crawled_at, "
+            "changed_at = CASE WHEN ? THEN excluded.changed_at ELSE products.changed_at END",
+            (
+                url, source_hash, product_hash(product),
+                json.dumps(product, ensure_ascii=False), now, now, 1 if changed else 0,
+            ),
+        )
+
+
+def save_context(db_path, ref, context):
+    """제품 컨텍스트 블록을 저장합니다 (같은 ref는 덮어씀)."""
+    with closing(_connect(db_path)) as conn, conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO product_contexts (ref, context_json, created_at) VALUES (?, ?, ?)",
+            (ref, json.dumps(context, ensure_ascii=False), time.time()),
+        )
+
+
+def load_context(db_path, ref):
+    """저장된 제품 컨텍스트를 돌려줍니다 (없으면 None)."""
+    with closing(_connect(db_path)) as conn:
+        row = conn.execute("SELECT context_json FROM product_contexts WHERE ref = ?", (ref,)).fetchone()
+    return json.loads(row[0]) if row else None
@@ -0,0 +1,343 @@
+import os
+import re
+from functools import lru_cache
+
+
+HOST_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "host")
+HOST_FILES = ("ae-functions.jsx", "index.jsx")
+
+# ES3/ExtendScript에서 별도 선언 없이 호출할 수 있는 전역 함수/생성자입니다.
+BUILTIN_FUNCTIONS = frozenset((
+    "alert", "confirm", "prompt", "eval", "parseInt", "parseFloat", "isNaN", "isFinite",
+    "encodeURI", "decodeURI", "encodeURIComponent", "decodeURIComponent", "escape", "unescape",
+    "String", "Number", "Boolean", "Array", "Object", "Date", "RegExp", "Function",
+    "Error", "TypeError", "RangeError", "SyntaxError", "ReferenceError",
+    "File", "Folder", "Socket", "XML", "XMLList", "UnitValue", "Window", "localize", "isValid",
+    "KeyframeEase", "MarkerValue", "Shape", "TextDocument", "ImportOptions", "RenderQueueItem",
+    "writeLn", "clearOutput", "timeToCurrentFormat", "currentFormatToTime", "generateRandomNumber",
+))
+
+# 식별자 뒤에 "("가 와도 함수 호출이 아닌 키워드입니다.
+KEYWORDS = frozenset((
+    "break", "case", "catch", "continue", "default", "delete", "do", "else", "finally", "for",
+    "function", "if", "in", "instanceof", "new", "return", "switch", "this", "throw", "try",
+    "typeof", "var", "void", "while", "with", "true", "false", "null", "undefined", "const",
+))
+
+# ES3(ExtendScript)에는 없는 문법입니다.
+UNSUPPORTED_KEYWORDS = {
+    "let": "let 선언은 ES3에서 지원되지 않습니다 (var 사용)",
+    "class": "class 문법은 ES3에서 지원되지 않습니다",
+    "async": "async 함수는 ES3에서 지원되지 않습니다",
+    "await": "await는 ES3에서 지원되지 않습니다",
+    "yield": "yield는 ES3에서 지원되지 않습니다",
+}
+UNSUPPORTED_PUNCTUATORS = {
+    "=>": "화살표 함수는 ES3에서 지원되지 않습니다",
+    "...": "전개 연산자는 ES3에서 지원되지 않습니다",
+}
+
+# 이 키워드 뒤에 오는 "/"는 나눗셈이 아니라 정규식 리터럴의 시작입니다.
+REGEX_PREFIX_KEYWORDS = frozenset((
+    "return", "typeof", "instanceof", "in", "new", "delete", "void", "throw", "case", "do", "else",
+))
+
+NAME_RE = re.compile(r"(?:[^\W\d]|\$)[\w$]*")
+NUMBER_RE = re.compile(r"0[xX][0-9a-fA-F]+|(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+PUNCTUATORS = (
+    ">>>=", "===", "!==", ">>>", "<<=", ">>=", "...", "=>", "==", "!=", "<=", ">=", "&&", "||",
+    "++", "--", "+=", "-=", "*=", "/=", "%=", "&=", "|=", "^=", "<<", ">>",
+    "{", "}", "(", ")", "[", "]", ";", ",", "<", ">", "+", "-", "*", "/", "%", "&", "|",
+    "^", "!", "~", "?", ":", "=", ".",
+)
+BRACKET_PAIRS = {")": "(", "]": "[", "}": "{"}
+HOST_FUNCTION_RE = re.compile(r"^\s*function\s+([A-Za-z_$][\w$]*)\s*\(", re.MULTILINE)
+
+
+class ScriptSyntaxError(Exception):
+    """토큰화 단계에서 더 진행할 수 없는 문법 오류입니다."""
+
+    def __init__(self, line, message):
+        super().__init__(f"line {line}: {message}")
+        self.line = line
+
+
+@lru_cache(maxsize=1)
+def load_host_functions(host_dir=HOST_DIR):
+    """host/*.jsx에 정의된 함수 이름을 모읍니다 (한 번만 읽고 캐시)."""
+    names = set()
+    for filename in HOST_FILES:
+        path = os.path.join(host_dir, filename)
+        if not os.path.isfile(path):
+            continue
+        with open(path, "r", encoding="utf-8") as handle:
+            names.update(HOST_FUNCTION_RE.findall(handle.read()))
+    return frozenset(names)
+
+
+def _regex_allowed(prev):
+    """직전 토큰을 보고 "/"가 정규식 리터럴로 해석되는지 판단합니다."""
+    if prev is None:
+        return True
+    kind, value, _ = prev
+    if kind == "punct":
+        # i++ / 2 처럼 ++/-- 뒤의 "/"는 나눗셈입니다.
+        return value not in (")", "]", "}", "++", "--")
+    if kind == "name":
+        return value in REGEX_PREFIX_KEYWORDS
+    return False
+
+
+def tokenize(code):
+    """ExtendScript 코드를 (종류, 값, 줄번호) 토큰 목록으로 바꿉니다."""
+    tokens = []
+    pos = 0
+    line = 1
+    length = len(code)
+
+    while pos < length:
+        char = code[pos]
+
+        if char == "\n":
+            line += 1
+            pos += 1
+            continue
+        if char.isspace():
+            pos += 1
+            continue
+
+        # 주석
+        if code.startswith("//", pos):
+            end = code.find("\n", pos)
+            pos = length if end == -1 else end
+            continue
+        if code.startswith("/*", pos):
+            end = code.find("*/", pos + 2)
+            if end == -1:
+                raise ScriptSyntaxError(line, "닫히지 않은 블록 주석입니다")
+            line += code.count("\n", pos, end)
+            pos = end + 2
+            continue
+
+        # 문자열
+        if char in ("'", '"'):
+            start_line = line
+            pos += 1
+            while True:
+                if pos >= length or code[pos] == "\n":
+                    raise ScriptSyntaxError(start_line, "닫히지 않은 문자열입니다")
+                if code[pos] == "\\":
+                    if code[pos + 1:pos + 2] == "\n":
+                        line += 1
+                    pos += 2
+                    continue
+                if code[pos] == char:
+                    pos += 1
+                    break
+                pos += 1
+            tokens.append(("str", char, start_line))
+            continue
+
+        if char == "`":
+            raise ScriptSyntaxError(line, "템플릿 문자열(`)은 ES3에서 지원되지 않습니다")
+
+        # 정규식 리터럴
+        if char == "/" and _regex_allowed(tokens[-1] if tokens else None):
+            pos += 1
+            in_class = False
+            while True:
+                if pos >= length or code[pos] == "\n":
+                    raise ScriptSyntaxError(line, "닫히지 않은 정규식입니다")
+                current = code[pos]
+                if current == "\\":
+                    pos += 2
+                    continue
+                if current == "[":
+                    in_class = True
+                elif current == "]":
+                    in_class = False
+                elif current == "/" and not in_class:
+                    pos += 1
+                    break
+                pos += 1
+            match = NAME_RE.match(code, pos)
+            if match:
+                pos = match.end()
+            tokens.append(("regex", "/", line))
+            continue
+
+        match = NUMBER_RE.match(code, pos)
+        if match and (char.isdigit() or (char == "." and code[pos + 1:pos + 2].isdigit())):
+            tokens.append(("num", match.group(), line))
+            pos = match.end()
+            continue
+
+        match = NAME_RE.match(code, pos)
+        if match:
+            tokens.append(("name", match.group(), line))
+            pos = match.end()
+            continue
+
+        for punct in PUNCTUATORS:
+            if code.startswith(punct, pos):
+                tokens.append(("punct", punct, line))
+                pos += len(punct)
+                break
+        else:
+            raise ScriptSyntaxError(line, f"알 수 없는 문자입니다: {char!r}")
+
+    return tokens
+
+
+def _check_brackets(tokens, errors):
+    """괄호 짝이 맞는지 확인합니다."""
+    stack = []
+    for kind, value, line in tokens:
+        if kind != "punct":
+            continue
+        if value in ("(", "[", "{"):
+            stack.append((value, line))
+        elif value in BRACKET_PAIRS:
+            if not stack or stack[-1][0] != BRACKET_PAIRS[value]:
+                errors.append(f"line {line}: 짝이 맞지 않는 '{value}'입니다")
+                return
+            stack.pop()
+    for value, line in stack:
+        errors.append(f"line {line}: 닫히지 않은 '{value}'입니다")
+
+
+def _declared_names(tokens):
+    """스크립트 안에서 선언된 함수/변수/매개변수 이름을 모읍니다."""
+    names = set()
+    for index, (kind, value, _) in enumerate(tokens[:-1]):
+        if kind != "name" or value not in ("function", "var", "catch"):
+            continue
+        nxt = tokens[index + 1]
+        if nxt[0] == "name":
+            names.add(nxt[1])
+        if value == "function" or value == "catch":
+            # 매개변수 목록: function name(a, b) / function (a, b) / catch (e)
+            cursor = index + 1
+            while cursor < len(tokens) and tokens[cursor][1] != "(":
+                cursor += 1
+            cursor += 1
+            while cursor < len(tokens) and tokens[cursor][1] != ")":
+                if tokens[cursor][0] == "name":
+                    names.add(tokens[cursor][1])
+                cursor += 1
+        elif value == "var":
+            # var a = 1, b = 2 처럼 쉼표로 이어지는 선언
+            depth = 0
+            prev_value = "var"
+            for kind2, value2, _ in tokens[index + 1:]:
+                if value2 in ("(", "[", "{"):
+                    depth += 1
+                elif value2 in (")", "]", "}"):
+                    if depth == 0:
+                        break
+                    depth -= 1
+                elif value2 == ";" and depth == 0:
+                    break
+                elif depth == 0 and kind2 == "name" and prev_value in ("var", ","):
+                    names.add(value2)
+                prev_value = value2
+    return names
+
+
+def _check_calls(tokens, known_functions, errors):
+    """선언되지 않은 전역 함수 호출을 찾습니다."""
+    declared = _declared_names(tokens)
+    reported = set()
+    for index, (kind, value, line) in enumerate(tokens[:-1]):
+        if kind != "name" or tokens[index + 1][1] != "(":
+            continue
+        if value in KEYWORDS or value in BUILTIN_FUNCTIONS or value in declared:
+            continue
+        if value in known_functions or value in reported:
+            continue
+        prev = tokens[index - 1][1] if index > 0 else None
+        if prev in (".", "function", "new"):
+            continue
+        reported.add(value)
+        errors.append(f"line {line}: 정의되지 않은 함수 호출입니다: {value}()")
+
+
+def _check_undo_groups(tokens, errors, warnings):
+    """app.beginUndoGroup / app.endUndoGroup 짝이 맞는지 확인합니다."""
+    begins = 0
+    ends = 0
+    for index, (kind, value, line) in enumerate(tokens[1:], start=1):
+        if kind != "name" or tokens[index - 1][1] != ".":
+            continue
+        if value == "beginUndoGroup":
+            begins += 1
+        elif value == "endUndoGroup":
+            ends += 1
+            if begins == 0:
+                errors.append(f"line {line}: beginUndoGroup 없이 endUndoGroup이 호출됩니다")
+    if begins > ends:
+        errors.append(f"beginUndoGroup {begins}회, endUndoGroup {ends}회로 Undo Group이 닫히지 않았습니다")
+    elif begins and ends > begins:
+        # if/else 분기마다 endUndoGroup을 부르는 조기 종료 패턴은 정상입니다 (분기별 실행 여부는 정적으로 알 수 없음).
+        warnings.append(f"endUndoGroup이 {ends}회로 beginUndoGroup({begins}회)보다 많습니다. 분기마다 한 번만 실행되는지 확인하세요")
+    return begins, ends
+
+
+def validate_script(code, known_functions=None):
+    """생성된 ExtendScript를 AE로 보내기 전에 정적 검사합니다."""
+    if known_functions is None:
+        known_functions = load_host_functions()
+
+    report = {"valid": True, "errors": [], "warnings": [], "undoGroups": {"begin": 0, "end": 0}}
+    if not code or not code.strip():
+        report["valid"] = False
+        report["errors"].append("코드가 비어 있습니다")
+        return report
+
+    try:
+        tokens = tokenize(code)
+    except ScriptSyntaxError as exc:
+        report["valid"] = False
+        report["errors"].append(str(exc))
+        return report
+
+    errors = report["errors"]
+    for kind, value, line in tokens:
+        if kind == "name" and value in UNSUPPORTED_KEYWORDS:
+            errors.append(f"line {line}: {UNSUPPORTED_KEYWORDS[value]}")
+        elif kind == "punct" and value in UNSUPPORTED_PUNCTUATORS:
+            errors.append(f"line {line}: {UNSUPPORTED_PUNCTUATORS[value]}")
+
+    _check_brackets(tokens, errors)
+    begins, ends = _check_undo_groups(tokens, errors, report["warnings"])
+    report["undoGroups"] = {"begin": begins, "end": ends}
+    if begins == 0:
+        report["warnings"].append("Undo Group이 없습니다")
+    _check_calls(tokens, known_functions, errors)
+
+    report["valid"] = not errors
+    return report
+
+
+def repair_script(code, report):
+    """모델 호출 없이 고칠 수 있는 문제(Undo Group 누락)를 바로잡습니다."""
+    begins = report["undoGroups"]["begin"]
+    ends = report["undoGroups"]["end"]
+    repaired = code.strip()
+    if begins == 0 and ends == 0:
+        repaired = f'app.beginUndoGroup("Gemini Action");\n{repaired}\napp.endUndoGroup();'
+    elif begins > ends:
+        repaired += "\napp.endUndoGroup();" * (begins - ends)
+    return repaired
+
+
+def build_repair_prompt(code, errors):
+    """검증 오류를 모델에게 한 번 더 고쳐달라고 요청하는 프롬프트를 만듭니다."""
+    error_lines = "\n".join(f"- {error}" for error in errors)
+    return (
+        "The following After Effects ExtendScript (ES3) failed static validation.\n"
+        "Fix ONLY the listed problems and return the full corrected script in a single "
+        "```javascript code block. Do not use ES5+ syntax (let, arrow functions, template strings).\n"
+        "Only call functions that are defined in the script, ES3 built-ins, or the host library.\n\n"
+        f"Errors:\n{error_lines}\n\nScript:\n```javascript\n{code}\n```"
+    )
@@ -2,11 +2,27 @@ import os
 import json
 import re
 import time
-import requests
-from flask import Flask, request, jsonify
-import google.generativeai as genai
+from functools import lru_cache
 
-from crawler import crawl_product_page
+from flask import Flask, g, request, jsonify
+
+from concurrent.futures import ThreadPoolExecutor
+
+from crawler import crawl_and_store
+from copy_writer import (
+    MAX_VARIANTS,
+    build_copy_prompt,
+    build_copy_repair_prompt,
+    finalize_copy,
+    validate_copy,
+)
+from lazy_import import lazy_import, warm_up
+from command_schema import build_batch_script, describe_commands, validate_command_batch
+from model_router import load_routing_config, select_model
+from product_context import get_product_context, register_product_context
+from product_store import default_db_path, list_urls
+from script_validator import build_repair_prompt, repair_script, validate_script
+from video_proxy import cleanup_proxy_cache, find_tool, prepare_video
 from media_utils import (
     PILLOW_AVAILABLE,
     cleanup_old_images,
@@ -14,6 +30,14 @@ from media_utils import (
     ensure_temp_dir,
 )
 
+# /health는 무거운 의존성 없이 바로 응답하도록, Gemini SDK 등은 처음 쓸 때(또는 백그라운드 warm-up에서) 로드합니다.
+genai = lazy_import("google.generativeai")
+glm = lazy_import("google.ai.generativelanguage")
+# Gemini API 오류(잘못된 키, 할당량 초과 등)는 google.api_core 예외로 올라옵니다.
+google_exceptions = lazy_import("google.api_core.exceptions")
+requests = lazy_import("requests")
+WARM_UP_MODULES = ("google.generativeai", "requests", "bs4", "soupsieve", "PIL.Image", "PIL.ImageFile")
+
 app = Flask(__name__)
 
 @app.route('/health', methods=['GET'])
@@ -21,8 +45,41 @@ def health_check():
     return jsonify({"status": "ok", "message": "Server is running"})
 
 
+@lru_cache(maxsize=16)
+def gemini_client(api_key):
+    """API 키별 Gemini 클라이언트입니다. (전역 genai.configure 대신 사용)
+
+    클라이언트는 요청마다 새로 만들지 않고 API 키별로 재사용합니다. gRPC 채널 생성 비용이 크고,
+    GAPIC 클라이언트는 여러 스레드에서 함께 써도 안전합니다.
+    """
+    return glm.GenerativeServiceClient(client_options={"api_key": api_key})
+
+
+def use_api_key(api_key):
+    """이번 요청에서 쓸 Gemini 클라이언트를 준비합니다. 실패하면 400 응답을 돌려줍니다."""
+    try:
+        g.gemini_client = gemini_client(api_key)
+    except Exception as e:
+        return jsonify({"error": "API Key 설정 실패", "details": str(e)}), 400
+    return None
+
+
+def new_model(model_name, **kwargs):
+    """이번 요청의 API 키 클라이언트를 붙인 모델 객체를 만듭니다. (전역 설정을 바꾸지 않음)"""
+    model = genai.GenerativeModel(model_name, **kwargs)
+    # GenerativeModel._client는 비공개 속성입니다. google-generativeai 0.8.6(requirements.txt 고정)에서
+    # generate_content/ChatSession이 이 속성의 클라이언트를 쓰는 것을 확인했고, tests/test_server.py가 검증합니다.
+    model._client = g.gemini_client
+    return model
+
+
 # 임시 파일(이미지/영상)을 저장할 폴더를 준비합니다.
 TEMP_IMG_DIR = ensure_temp_dir(os.path.dirname(__file__))
+# 템플릿 규격에 맞춘 영상 프록시는 재사용하도록 별도 폴더에 캐시합니다.
+PROXY_CACHE_DIR = os.path.join(TEMP_IMG_DIR, "proxies")
+# 재크롤링 시 변경 감지를 위해 제품 정보를 SQLite에 보관합니다.
+PRODUCT_DB_PATH = default_db_path(os.path.dirname(__file__))
+RECRAWL_WORKERS = 4
 
 def extract_code_from_markdown(text):
     """마크다운 코드 블록에서 실제 코드만 추출"""
@@ -36,6 +93,52 @@ def extract_code_from_markdown(text):
     # 코드 블록이 없으면 원본 반환 (전처리)
     return text.replace("```javascript", "").replace("```jsx", "").replace("```", "").strip()
 
+def validate_generated_code(code):
+    """생성된 코드를 AE로 보내기 전에 정적 검사하고, 실패하면 한 번만 자동 수정합니다."""
+    report = validate_script(code)
+    if report["valid"]:
+        return code, report
+
+    # 1) Undo Group 누락처럼 규칙으로 고칠 수 있는 문제는 모델 없이 바로 고칩니다.
+    fixed = repair_script(code, report)
+    fixed_report = validate_script(fixed)
+    if fixed_report["valid"]:
+        fixed_report["repaired"] = True
+        return fixed, fixed_report
+
+    # 2) 남은 오류는 모델에게 한 번만 수정을 요청합니다.
+    try:
+        model_name = select_model(response_type='code', prompt_size=len(fixed))
+        model = new_model(model_name)
+        response = model.generate_content(build_repair_prompt(fixed, fixed_report["errors"]))
+        candidate = extract_code_from_markdown(response.text.strip())
+        candidate_report = validate_script(candidate)
+        if not candidate_report["valid"]:
+            candidate = repair_script(candidate, candidate_report)
+            candidate_report = validate_script(candidate)
+        if candidate_report["valid"]:
+            candidate_report["repaired"] = True
+            return candidate, candidate_report
+    except Exception as e:
+        print(f"[WARN] 코드 자동 수정 실패: {e}")
+
+    fixed_report["repaired"] = False
+    return fixed, fixed_report
+
+
+def lookup_product_block(data):
+    """요청의 productRef로 캐시된 제품 컨텍스트 블록을 찾습니다. (블록, 오류 응답) 반환"""
+    ref = data.get('productRef')
+    if not ref:
+        return "", None
+    context = get_product_context(ref, db_path=PRODUCT_DB_PATH)
+    if context is None:
+        return "", (jsonify({
+            "error": "알 수 없는 productRef입니다",
+            "details": "/product-context로 제품을 다시 등록하세요"
+        }), 400)
+    return context["block"], None
+
 @app.route('/chat', methods=['POST'])
 def chat():
     """Gemini API를 사용한 채팅 엔드포인트"""
@@ -55,19 +158,18 @@ def chat():
     if not user_prompt:
         return jsonify({"error": "프롬프트가 비어있습니다"}), 400
 
-    # Gemini 설정
-    try:
-        genai.configure(api_key=api_key)
-    except Exception as e:
-        return jsonify({
-            "error": "API Key 설정 실패",
-            "details": str(e)
-        }), 400
+    # Gemini 설정 (요청별 클라이언트)
+    error_response = use_api_key(api_key)
+    if error_response:
+        return error_response
     
     # Get conversation context
     context = data.get('context', {})
     history = data.get('history', [])
     state = data.get('state', 'idle')
+    product_block, error_response = lookup_product_block(data)
+    if error_response:
+        return error_response
     
     # Conversational System Instruction
     system_instruction = """
@@ -150,6 +252,10 @@ def chat():
     
     Remember: Be conversational, helpful, and always confirm before generating code.
     """
+    # 제품 정보는 슬롯에 필요한 필드만, 같은 제품이면 매 턴 같은 블록으로 맨 앞에 붙입니다.
+    # (/generate-code와 같이, 같은 제품의 턴끼리 시스템 지시 앞부분이 같도록 합니다)
+    if product_block:
+        system_instruction = f"{product_block}\n\n{system_instruction}"
 
     # Build conversation history for Gemini
     gemini_history = []
@@ -160,15 +266,19 @@ def chat():
             "parts": [msg.get('content', '')]
         })
     
+    # Include AE context if available
+    full_prompt = user_prompt
+    if context:
+        full_prompt = f"[After Effects Context]\n{json.dumps(context, indent=2)}\n\n[User Request]\n{user_prompt}"
+
+    # 대화 상태와 프롬프트 크기로 이번 턴에 쓸 모델을 고릅니다.
+    prompt_size = len(full_prompt) + sum(len(part) for msg in gemini_history for part in msg["parts"])
+    model_name = select_model(state=state, prompt_size=prompt_size)
+
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp', system_instruction=system_instruction)
+        model = new_model(model_name, system_instruction=system_instruction)
         chat = model.start_chat(history=gemini_history)
         
-        # Include AE context if available
-        full_prompt = user_prompt
-        if context:
-            full_prompt = f"[After Effects Context]\n{json.dumps(context, indent=2)}\n\n[User Request]\n{user_prompt}"
-        
         response = chat.send_message(full_prompt)
         text_response = response.text.strip()
         
@@ -176,14 +286,23 @@ def chat():
         if text_response.startswith('{'):
             try:
                 response_data = json.loads(text_response)
-                
-                # Return structured response
-                return jsonify({
+                response_type = response_data.get('type', 'clarification')
+                response_payload = response_data.get('data', {})
+
+                result = {
                     "status": "success",
-                    "type": response_data.get('type', 'clarification'),
+                    "type": response_type,
                     "content": response_data.get('content', ''),
-                    "data": response_data.get('data', {})
-                })
+                    "data": response_payload,
+                    "model": model_name
+                }
+
+                # 코드 응답은 AE로 보내기 전에 서버에서 먼저 검증합니다.
+                if response_type == 'code' and response_payload.get('code'):
+                    response_payload['code'], result["validation"] = validate_generated_code(response_payload['code'])
+
+                # Return structured response
+                return jsonify(result)
                 
             except json.JSONDecodeError:
                 # If not valid JSON, treat as plain text response
@@ -197,15 +316,19 @@ def chat():
             # Undo Group 확인 및 추가
             if 'app.beginUndoGroup' not in clean_code:
                 clean_code = f'app.beginUndoGroup("Gemini Action");\n{clean_code}\napp.endUndoGroup();'
+            clean_code, validation = validate_generated_code(clean_code)
             
             return jsonify({
                 "status": "success", 
                 "type": "code", 
                 "log": "AE 스크립트 작성 완료", 
-                "code": clean_code
+                "code": clean_code,
+                "data": {"code": clean_code, "codeType": "extendscript"},
+                "validation": validation,
+                "model": model_name
             })
 
-    except genai.types.GoogleGenerativeAIError as e:
+    except google_exceptions.GoogleAPIError as e:
         return jsonify({
             "error": "Gemini API 오류",
             "details": str(e),
@@ -219,7 +342,7 @@ def chat():
 
 @app.route('/crawl-product', methods=['POST'])
 def crawl_product():
-    """제품 상세 페이지 URL을 받아 핵심 정보를 수집합니다."""
+    """제품 상세 페이지 URL을 받아 핵심 정보를 수집하고 제품 저장소에 기록합니다."""
     data = request.json or {}
     url = data.get('url')
 
@@ -228,9 +351,18 @@ def crawl_product():
         return jsonify({"error": "Missing product URL"}), 400
 
     try:
-        # 크롤러가 HTML을 다운로드하고 제품 정보를 추출합니다.
-        product = crawl_product_page(url)
-        return jsonify({"status": "success", "product": product})
+        # 크롤러가 HTML을 다운로드하고 제품 정보를 추출해 저장합니다. (/recrawl-products 대상이 됨)
+        result = crawl_and_store(url, PRODUCT_DB_PATH)
+        product = result["product"]
+        # 이후 /chat, /generate-code 턴에서는 productRef로 제품 정보를 참조합니다.
+        context = register_product_context(product, db_path=PRODUCT_DB_PATH)
+        return jsonify({
+            "status": "success",
+            "product": product,
+            "productRef": context["ref"],
+            "crawlStatus": result["status"],
+            "changes": result["changes"],
+        })
     except requests.exceptions.RequestException as exc:
         # 네트워크/요청 오류(페이지 접근 실패 등)
         return jsonify({
@@ -247,6 +379,127 @@ def crawl_product():
         }), 500
 
 
+@app.route('/product-context', methods=['POST'])
+def product_context():
+    """제품 정보로 템플릿 슬롯용 컨텍스트 블록을 만들고 참조 키를 돌려줍니다."""
+    data = request.json or {}
+    product = data.get('product')
+    media = data.get('media')
+
+    if not isinstance(product, dict):
+        return jsonify({"status": "error", "message": "Missing product"}), 400
+    if media is not None and not isinstance(media, dict):
+        return jsonify({"status": "error", "message": "media must be an object of slot paths"}), 400
+
+    context = register_product_context(product, media, db_path=PRODUCT_DB_PATH)
+    return jsonify({
+        "status": "success",
+        "productRef": context["ref"],
+        "slots": context["slots"],
+        "media": context["media"],
+        "block": context["block"]
+    })
+
+
+@app.route('/recrawl-products', methods=['POST'])
+def recrawl_products():
+    """저장소의 제품(또는 지정한 URL)을 다시 크롤링하고 필드별 변경 내용을 보고합니다."""
+    data = request.json or {}
+    urls = data.get('urls') or list_urls(PRODUCT_DB_PATH)
+    # 기본은 증분 모드: 원본 해시가 같은 페이지는 파싱을 건너뜁니다.
+    incremental = data.get('incremental', True)
+
+    if not isinstance(urls, list) or not all(isinstance(url, str) for url in urls):
+        return jsonify({"status": "error", "message": "urls must be a list of strings"}), 400
+    # "false" 같은 문자열은 bool()로 True가 되므로 JSON true/false만 받습니다.
+    if not isinstance(incremental, bool):
+        return jsonify({"status": "error", "message": "incremental must be a boolean"}), 400
+
+    def recrawl(url):
+        try:
+            return crawl_and_store(url, PRODUCT_DB_PATH, incremental=incremental)
+        except Exception as exc:
+            return {"url": url, "status": "error", "details": str(exc)}
+
+    with ThreadPoolExecutor(max_workers=RECRAWL_WORKERS) as pool:
+        results = list(pool.map(recrawl, urls))
+
+    return jsonify({
+        "status": "success",
+        "results": results,
+        # 영상을 다시 만들어야 하는 제품
+        "changed": [item["url"] for item in results if item["status"] in ("new", "changed")],
+        "errors": [item["url"] for item in results if item["status"] == "error"],
+    })
+
+
+def parse_json_response(text):
+    """모델 응답에서 JSON 객체를 꺼냅니다 (```json 코드 블록 포함)."""
+    match = re.search(r'```(?:json)?\s*\n(.*?)\n```', text, re.DOTALL)
+    if match:
+        text = match.group(1)
+    try:
+        return json.loads(text.strip())
+    except json.JSONDecodeError:
+        return None
+
+
+def generate_command_batch(params, product_block=""):
+    """확인된 파라미터로 executeCommand 명령 목록(JSON)을 생성하고 검증합니다."""
+    batch_prompt = f"""
+    Based on the confirmed parameters, plan the After Effects work as a list of host commands.
+    Do NOT write ExtendScript. Use ONLY these commands and arguments ("?" marks optional).
+    Each argument is listed with its type and description (value format, range, default):
+{describe_commands()}
+
+    RULES:
+    - Return ONLY valid JSON with this structure:
+    {{
+        "type": "commands",
+        "content": "Brief description",
+        "data": {{"commands": [{{"command": "createTextLayer", "args": {{"text": "Hello"}}}}]}}
+    }}
+    - Follow each argument's description for its value format. Colors are [r, g, b] in 0-1 range
+      unless the description says otherwise (createComposition.backgroundColor is {{"r", "g", "b"}} in 0-255)
+    - Keep the list as short as possible
+    """
+    params_str = json.dumps(params, indent=2, ensure_ascii=False)
+    full_prompt = f"{batch_prompt}\n\nConfirmed Parameters:\n{params_str}\n\nGenerate the commands now."
+    if product_block:
+        full_prompt = f"{product_block}\n\n{full_prompt}"
+
+    model_name = select_model(state='executing', response_type='code', prompt_size=len(full_prompt))
+    model = new_model(model_name)
+    response_data = parse_json_response(model.generate_content(full_prompt).text) or {}
+    commands = (response_data.get('data') or {}).get('commands')
+    normalized, errors = validate_command_batch(commands)
+
+    if errors:
+        # 스키마 오류는 모델에게 한 번만 수정을 요청합니다.
+        repair_prompt = (
+            f"{full_prompt}\n\nYour previous answer failed validation:\n"
+            + "\n".join(f"- {error}" for error in errors)
+            + f"\n\nPrevious answer:\n{json.dumps(response_data, ensure_ascii=False)}\n\nReturn the corrected JSON."
+        )
+        retry_data = parse_json_response(model.generate_content(repair_prompt).text) or {}
+        retry_commands = (retry_data.get('data') or {}).get('commands')
+        retry_normalized, retry_errors = validate_command_batch(retry_commands)
+        if not retry_errors:
+            response_data, normalized, errors = retry_data, retry_normalized, []
+
+    result = {
+        "status": "success",
+        "type": "commands",
+        "content": response_data.get('content', ''),
+        "commands": normalized,
+        "validation": {"valid": not errors, "errors": errors},
+        "model": model_name
+    }
+    if not errors:
+        result["code"] = build_batch_script(normalized)
+    return result
+
+
 @app.route('/generate-code', methods=['POST'])
 def generate_code():
     """사용자가 확인한 파라미터로 ExtendScript 코드를 생성합니다."""
@@ -257,11 +510,21 @@ def generate_code():
     
     if not api_key:
         return jsonify({"error": "API Key가 필요합니다"}), 400
+    product_block, error_response = lookup_product_block(data)
+    if error_response:
+        return error_response
     
-    try:
-        genai.configure(api_key=api_key)
-    except Exception as e:
-        return jsonify({"error": "API Key 설정 실패", "details": str(e)}), 400
+    error_response = use_api_key(api_key)
+    if error_response:
+        return error_response
+
+    # mode=commands: 자유 형식 스크립트 대신 executeCommand 명령 목록을 생성합니다.
+    if data.get('mode') == 'commands':
+        try:
+            result = generate_command_batch(context.get('parameters', {}), product_block)
+        except Exception as e:
+            return jsonify({"error": "명령 생성 중 오류 발생", "details": str(e)}), 500
+        return jsonify(result)
     
     # Build prompt for code generation
     code_gen_prompt = """
@@ -286,9 +549,14 @@ def generate_code():
     # Get parameters from context
     params_str = json.dumps(context.get('parameters', {}), indent=2, ensure_ascii=False)
     full_prompt = f"{code_gen_prompt}\n\nConfirmed Parameters:\n{params_str}\n\nGenerate the code now."
+    if product_block:
+        # 고정 블록을 앞에 두어 같은 제품의 턴끼리 프롬프트 앞부분이 같도록 합니다.
+        full_prompt = f"{product_block}\n\n{full_prompt}"
     
+    model_name = select_model(state='executing', response_type='code', prompt_size=len(full_prompt))
+
     try:
-        model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        model = new_model(model_name)
         response = model.generate_content(full_prompt)
         text_response = response.text.strip()
         
@@ -296,12 +564,18 @@ def generate_code():
         if text_response.startswith('{'):
             try:
                 response_data = json.loads(text_response)
-                return jsonify({
+                response_payload = response_data.get('data', {})
+                result = {
                     "status": "success",
                     "type": response_data.get('type', 'code'),
                     "content": response_data.get('content', ''),
-                    "data": response_data.get('data', {})
-                })
+                    "data": response_payload,
+                    "model": model_name
+                }
+                if response_payload.get('code'):
+                    response_payload['code'], result["validation"] = validate_generated_code(response_payload['code'])
+                    result["code"] = response_payload['code']
+                return jsonify(result)
             except json.JSONDecodeError:
                 pass
         
@@ -309,16 +583,150 @@ def generate_code():
         clean_code = extract_code_from_markdown(text_response)
         if 'app.beginUndoGroup' not in clean_code:
             clean_code = f'app.beginUndoGroup("AI Action");\n{clean_code}\napp.endUndoGroup();'
+        clean_code, validation = validate_generated_code(clean_code)
         
         return jsonify({
             "status": "success",
             "code": clean_code,
-            "type": "extendscript"
+            "validation": validation,
+            "type": "extendscript",
+            "model": model_name
         })
         
     except Exception as e:
         return jsonify({"error": "코드 생성 중 오류 발생", "details": str(e)}), 500
 
+@app.route('/generate-copy', methods=['POST'])
+def generate_copy():
+    """제품 정보로 템플릿 텍스트 슬롯 5개의 문구를 한 번의 모델 호출로 생성합니다."""
+    data = request.json or {}
+    api_key = data.get('apiKey')
+    product = data.get('product')
+    language = data.get('language', 'ko')
+
+    if not api_key:
+        return jsonify({"error": "API Key가 필요합니다"}), 400
+    try:
+        variants = int(data.get('variants', 1))
+    except (TypeError, ValueError):
+        variants = 0
+    if not 1 <= variants <= MAX_VARIANTS:
+        return jsonify({"error": f"variants는 1~{MAX_VARIANTS} 사이여야 합니다"}), 400
+
+    # product를 직접 보내거나, 이미 등록된 productRef로 참조합니다.
+    if isinstance(product, dict):
+        product_ref = register_product_context(product, db_path=PRODUCT_DB_PATH)["ref"]
+        product_block = get_product_context(product_ref, db_path=PRODUCT_DB_PATH)["block"]
+    elif data.get('productRef'):
+        product_ref = data['productRef']
+        product_block, error_response = lookup_product_block(data)
+        if error_response:
+            return error_response
+    else:
+        return jsonify({"error": "product 또는 productRef가 필요합니다"}), 400
+
+    error_response = use_api_key(api_key)
+    if error_response:
+        return error_response
+
+    prompt = build_copy_prompt(product_block, variants, language)
+    model_name = select_model(state='idle', response_type='copy', prompt_size=len(prompt))
+    # JSON 모드로 받아 슬롯/변형을 그대로 파싱합니다.
+    generation_config = {"response_mime_type": "application/json"}
+
+    try:
+        model = new_model(model_name)
+        response_data = parse_json_response(
+            model.generate_content(prompt, generation_config=generation_config).text
+        ) or {}
+        normalized, errors = validate_copy(response_data, variants)
+        repaired = False
+
+        if errors:
+            # 길이 초과/누락은 모델에게 한 번만 수정을 요청합니다.
+            retry_data = parse_json_response(model.generate_content(
+                build_copy_repair_prompt(prompt, errors, response_data),
+                generation_config=generation_config
+            ).text) or {}
+            retry_normalized, retry_errors = validate_copy(retry_data, variants)
+            if len(retry_errors) < len(errors) or (retry_normalized and not normalized):
+                normalized, errors, repaired = retry_normalized, retry_errors, True
+    except Exception as e:
+        return jsonify({"error": "문구 생성 중 오류 발생", "details": str(e)}), 500
+
+    if not normalized:
+        return jsonify({
+            "error": "문구 생성 결과를 해석할 수 없습니다",
+            "details": errors
+        }), 502
+
+    return jsonify({
+        "status": "success",
+        "productRef": product_ref,
+        # 남은 초과 문구는 마지막 줄을 말줄임표로 잘라 2~3줄 제한을 지킵니다.
+        "variants": finalize_copy(normalized),
+        "validation": {"valid": not errors, "errors": errors, "repaired": repaired},
+        "model": model_name
+    })
+
+
+@app.route('/prepare-media', methods=['POST'])
+def prepare_media():
+    """외부 미디어를 내려받고, 영상이면 프로브/프록시 변환 후 메타데이터를 돌려줍니다."""
+    data = request.json or {}
+    url = data.get('url')
+    media_type = data.get('type', 'image')
+
+    if not url:
+        return jsonify({"status": "error", "message": "Missing media URL"}), 400
+
+    try:
+        filename, filepath = download_and_prepare_media(
+            url, media_type, TEMP_IMG_DIR, expected_sha256=data.get('sha256')
+        )
+    except ValueError as exc:
+        return jsonify({"status": "error", "message": str(exc)}), 400
+    except Exception as exc:
+        return jsonify({
+            "status": "error",
+            "message": "Failed to download media",
+            "details": str(exc)
+        }), 500
+
+    result = {
+        "status": "success",
+        "type": media_type,
+        "filename": filename,
+        "filepath": filepath,
+        "importPath": filepath
+    }
+    if media_type != 'video':
+        return jsonify(result)
+
+    if not find_tool("ffprobe"):
+        # ffmpeg가 없으면 원본만 돌려주고, AE 쪽에서 파일 정보를 읽게 합니다.
+        result["media"] = None
+        result["warning"] = "ffprobe/ffmpeg가 없어 영상 정보 확인과 프록시 변환을 건너뛰었습니다."
+        return jsonify(result)
+
+    # 오래 쓰지 않은 프록시를 정리합니다. (몇 분에 한 번만 실제로 실행)
+    cleanup_proxy_cache(PROXY_CACHE_DIR)
+    try:
+        media = prepare_video(filepath, PROXY_CACHE_DIR)
+    except Exception as exc:
+        return jsonify({
+            "status": "error",
+            "message": "Failed to prepare video",
+            "details": str(exc)
+        }), 500
+
+    result["media"] = media
+    # AE에는 프록시가 있으면 프록시를 임포트합니다.
+    if media["proxy"]:
+        result["importPath"] = media["proxy"]
+    return jsonify(result)
+
+
 @app.route('/generate-media', methods=['POST'])
 def generate_media():
     """미디어 생성 요청을 받아 현재는 스텁 응답을 반환합니다."""
@@ -346,4 +754,10 @@ if __name__ == '__main__':
     print(f"[INFO] AfterEffectsMCP 서버 시작 (포트: {port})")
     print(f"[INFO] 임시 파일 경로: {TEMP_IMG_DIR}")
     print(f"[INFO] Pillow 사용 가능: {PILLOW_AVAILABLE}")
-    app.run(host='127.0.0.1', port=port, debug=False)
+    print(f"[INFO] ffmpeg 사용 가능: {bool(find_tool('ffmpeg') and find_tool('ffprobe'))}")
+    routing = load_routing_config()
+    print(f"[INFO] 모델 라우팅: 대화={routing['fast']}, 코드={routing['code']}")
+    # 서버는 바로 요청을 받고, 무거운 모듈은 그동안 백그라운드에서 로드합니다.
+    warm_up(WARM_UP_MODULES)
+    # 요청 상태(Gemini 클라이언트, 임시 파일)는 요청별로 분리돼 있어 스레드로 동시에 처리합니다.
+    app.run(host='127.0.0.1', port=port, debug=False, threaded=True)
@@ -0,0 +1,151 @@
+import os
+import re
+from functools import lru_cache
+from urllib.parse import urlparse
+
+try:
+    from lazy_import import lazy_import
+except ImportError:
+    # 테스트처럼 server 패키지 경로로 import 된 경우
+    from .lazy_import import lazy_import
+
+bs4 = lazy_import("bs4")
+soupsieve = lazy_import("soupsieve")
+
+# 호스트명 → 규칙. 조회는 호스트명과 상위 도메인(a.b.c → b.c → c)만 확인하므로 상수 시간입니다.
+_REGISTRY = {}
+
+SHOPIFY_PRODUCT_RE = re.compile(r"/products/([^/?#]+?)(?:\.json)?/?$")
+# 쉼표로 구분한 Shopify 커스텀 도메인을 환경 변수로 추가할 수 있습니다.
+SHOPIFY_DOMAINS_ENV = "SHOPIFY_DOMAINS"
+
+
+def make_rule(
+    name, image_hosts=(), image_selector="img", json_endpoint=None, parse_json=None, currency_endpoint=None,
+):
+    """사이트 규칙을 만듭니다. CSS 선택자는 처음 쓸 때 한 번만 컴파일합니다."""
+    return {
+        "name": name,
+        # 이 문자열이 들어간 이미지 URL만 후보로 씁니다 (비어 있으면 제한 없음).
+        "imageHosts": tuple(image_hosts),
+        "imageSelector": image_selector,
+        # 제품 URL → JSON API URL (없으면 HTML 파싱)
+        "jsonEndpoint": json_endpoint,
+        # JSON 응답 → 제품 필드 dict
+        "parseJson": parse_json,
+        # 제품 URL → 상점 정보 JSON URL (제품 JSON에 통화가 없을 때 응답의 currency 사용)
+        "currencyEndpoint": currency_endpoint,
+    }
+
+
+def register_site(hostnames, rule):
+    """호스트명(또는 상위 도메인) 목록에 규칙을 등록합니다."""
+    for hostname in hostnames:
+        _REGISTRY[hostname.strip().lower()] = rule
+    return rule
+
+
+def find_rule(url):
+    """URL의 호스트명에 맞는 규칙을 찾고, 없으면 일반 규칙을 돌려줍니다."""
+    hostname = (urlparse(url).hostname or "").lower()
+    labels = hostname.split(".")
+    for index in range(len(labels) - 1):
+        rule = _REGISTRY.get(".".join(labels[index:]))
+        if rule is not None:
+            return rule
+    return GENERIC_RULE
+
+
+@lru_cache(maxsize=None)
+def _compile_selector(selector):
+    return soupsieve.compile(selector)
+
+
+def select_nodes(rule, soup):
+    """규칙의 이미지 선택자로 태그를 찾습니다 (컴파일 결과는 캐시)."""
+    return _compile_selector(rule["imageSelector"]).select(soup)
+
+
+def _html_to_text(html):
+    """body_html 같은 HTML 조각을 줄 단위 텍스트로 바꿉니다."""
+    if not html:
+        return ""
+    return bs4.BeautifulSoup(html, "html.parser").get_text("\n").strip()
+
+
+def shopify_json_endpoint(url):
+    """Shopify 제품 URL을 /products/<handle>.json API 주소로 바꿉니다."""
+    parsed = urlparse(url)
+    match = SHOPIFY_PRODUCT_RE.search(parsed.path)
+    if not match:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}/products/{match.group(1)}.json"
+
+
+def shopify_meta_endpoint(url):
+    """Shopify 상점 정보(/meta.json) 주소입니다. 상점 기본 통화(currency)가 들어 있습니다."""
+    parsed = urlparse(url)
+    return f"{parsed.scheme}://{parsed.netloc}/meta.json"
+
+
+def _shopify_currency(variant):
+    """변형(variant)에 들어 있는 통화 코드를 찾습니다 (없으면 빈 문자열)."""
+    if variant.get("price_currency"):
+        return variant["price_currency"]
+    for entry in variant.get("presentment_prices") or []:
+        price = entry.get("price") if isinstance(entry, dict) else None
+        if isinstance(price, dict) and price.get("currency_code"):
+            return price["currency_code"]
+    return ""
+
+
+def parse_shopify_product(payload):
+    """Shopify 제품 JSON을 크롤러 필드로 정리합니다.
+
+    제품 JSON에 통화가 없으면 currency 키를 넣지 않습니다. (크롤러가 상점 정보에서 채움)
+    """
+    product = payload.get("product") or {}
+    variants = product.get("variants") or [{}]
+    variant = variants[0]
+    fields = {
+        "name": product.get("title", ""),
+        "description": _html_to_text(product.get("body_html", "")),
+        "price": str(variant.get("price", "") or ""),
+        "brand": product.get("vendor", ""),
+        "sku": variant.get("sku", "") or "",
+        "images": [image.get("src") for image in product.get("images", []) if image.get("src")],
+    }
+    currency = _shopify_currency(variant)
+    if currency:
+        fields["currency"] = currency
+    return fields
+
+
+# 등록되지 않은 사이트: JSON-LD/Open Graph + 문서 전체 img 태그
+GENERIC_RULE = make_rule("generic", image_hosts=("cdn.shopify.com", "amoremall"))
+
+SHOPIFY_RULE = register_site(
+    ["myshopify.com"],
+    make_rule(
+        "shopify",
+        image_hosts=("cdn.shopify.com",),
+        image_selector=".product img, [class*='product__media'] img, main img",
+        json_endpoint=shopify_json_endpoint,
+        parse_json=parse_shopify_product,
+        currency_endpoint=shopify_meta_endpoint,
+    ),
+)
+
+register_site(
+    ["amoremall.com"],
+    make_rule(
+        "amoremall",
+        image_hosts=("amoremall", "cdn.shopify.com"),
+        image_selector="main img, [class*='product'] img",
+    ),
+)
+
+register_site(
+    [domain for domain in os.environ.get(SHOPIFY_DOMAINS_ENV, "").split(",") if domain.strip()],
+    SHOPIFY_RULE,
+)
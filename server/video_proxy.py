@@ -0,0 +1,298 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+# docs/template-spec.md의 기본 규격(1920x1080, 30fps)입니다.
+TEMPLATE_WIDTH = 1920
+TEMPLATE_HEIGHT = 1080
+TEMPLATE_FPS = 30.0
+
+# 프레임마다 키프레임인(intra) 코덱은 AE 프리뷰가 가볍습니다.
+INTRA_CODECS = ("prores", "dnxhd", "mjpeg", "png", "qtrle")
+PROBE_TIMEOUT = 30
+TRANSCODE_TIMEOUT = 30 * 60
+# 캐시 키는 파일 전체 대신 앞/뒤 일부와 크기로 계산합니다.
+KEY_SAMPLE_BYTES = 1024 * 1024
+CACHE_CLEANUP_INTERVAL = 10 * 60
+
+
+def _env_int(name, default):
+    """양의 정수 환경 변수를 읽습니다. 값이 잘못되면 서버 시작을 막지 않고 기본값을 씁니다."""
+    value = os.environ.get(name)
+    if not value:
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        print(f"[WARN] {name}={value!r} 값이 올바르지 않아 기본값 {default}을 사용합니다.")
+        return default
+    return number
+
+
+PROXY_WORKERS = _env_int("PROXY_WORKERS", 2)
+# 프록시 캐시 한도: 마지막 사용 후 PROXY_CACHE_HOURS가 지났거나 전체 크기가 넘치면 오래된 것부터 지웁니다.
+PROXY_CACHE_HOURS = _env_int("PROXY_CACHE_HOURS", 72)
+PROXY_CACHE_MAX_MB = _env_int("PROXY_CACHE_MAX_MB", 20 * 1024)
+
+_executor = ThreadPoolExecutor(max_workers=PROXY_WORKERS)
+_jobs = {}
+_jobs_lock = threading.Lock()
+_cache_cleanup_lock = threading.Lock()
+_last_cache_cleanup = {}
+
+
+def find_tool(name):
+    """ffmpeg/ffprobe 실행 파일을 찾습니다 (FFMPEG_PATH 같은 환경 변수 우선)."""
+    return os.environ.get(f"{name.upper()}_PATH") or shutil.which(name)
+
+
+def _run(args, timeout):
+    """외부 명령을 실행하고 표준 출력을 돌려줍니다."""
+    result = subprocess.run(args, capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        raise RuntimeError(f"{os.path.basename(args[0])} 실행 실패: {result.stderr.strip()[-500:]}")
+    return result.stdout
+
+
+def _parse_rate(rate):
+    """ffprobe의 "30000/1001" 형태 프레임레이트를 숫자로 바꿉니다."""
+    if not rate or rate == "0/0":
+        return 0.0
+    if "/" in rate:
+        num, den = rate.split("/", 1)
+        return float(num) / float(den) if float(den) else 0.0
+    return float(rate)
+
+
+def probe_media(path):
+    """ffprobe로 컨테이너/스트림 정보를 읽어 AE에서 바로 쓸 수 있는 형태로 정리합니다."""
+    ffprobe = find_tool("ffprobe")
+    if not ffprobe:
+        raise RuntimeError("ffprobe를 찾을 수 없습니다. ffmpeg를 설치하거나 FFPROBE_PATH를 지정하세요.")
+
+    output = _run([
+        ffprobe, "-v", "error", "-print_format", "json",
+        "-show_format", "-show_streams", path,
+    ], PROBE_TIMEOUT)
+    info = json.loads(output or "{}")
+    fmt = info.get("format", {})
+    streams = info.get("streams", [])
+    video = next((s for s in streams if s.get("codec_type") == "video"), None)
+    audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+    if video is None:
+        raise RuntimeError("영상 스트림이 없는 파일입니다.")
+
+    fps = _parse_rate(video.get("avg_frame_rate")) or _parse_rate(video.get("r_frame_rate"))
+    duration = float(video.get("duration") or fmt.get("duration") or 0)
+    return {
+        "container": fmt.get("format_name", ""),
+        "duration": round(duration, 3),
+        "frames": int(round(duration * fps)) if fps else 0,
+        "sizeBytes": int(fmt.get("size") or 0),
+        "bitRate": int(fmt.get("bit_rate") or 0),
+        "codec": video.get("codec_name", ""),
+        "width": int(video.get("width") or 0),
+        "height": int(video.get("height") or 0),
+        "fps": round(fps, 3),
+        "pixelFormat": video.get("pix_fmt", ""),
+        "hasAudio": audio is not None,
+        "audioCodec": audio.get("codec_name", "") if audio else "",
+    }
+
+
+def proxy_reasons(meta, width=TEMPLATE_WIDTH, height=TEMPLATE_HEIGHT, fps=TEMPLATE_FPS):
+    """템플릿과 맞지 않는 이유 목록을 돌려줍니다 (비어 있으면 프록시 불필요)."""
+    reasons = []
+    if (meta["width"], meta["height"]) != (width, height):
+        reasons.append(f"resolution {meta['width']}x{meta['height']}")
+    if abs(meta["fps"] - fps) > 0.01:
+        reasons.append(f"fps {meta['fps']}")
+    if not meta["codec"].startswith(INTRA_CODECS):
+        reasons.append(f"long-GOP codec {meta['codec']}")
+    return reasons
+
+
+def _source_key(path, width, height, fps):
+    """원본 내용 + 템플릿 규격으로 프록시 캐시 키를 만듭니다."""
+    size = os.path.getsize(path)
+    digest = hashlib.sha256(f"{size}|{width}x{height}@{fps}".encode("ascii"))
+    with open(path, "rb") as handle:
+        digest.update(handle.read(KEY_SAMPLE_BYTES))
+        if size > KEY_SAMPLE_BYTES:
+            handle.seek(max(size - KEY_SAMPLE_BYTES, KEY_SAMPLE_BYTES))
+            digest.update(handle.read(KEY_SAMPLE_BYTES))
+    return digest.hexdigest()[:24]
+
+
+def transcode_proxy(source, target, width=TEMPLATE_WIDTH, height=TEMPLATE_HEIGHT, fps=TEMPLATE_FPS):
+    """템플릿 해상도/프레임레이트의 ProRes Proxy(.mov)로 변환합니다."""
+    ffmpeg = find_tool("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("ffmpeg를 찾을 수 없습니다. ffmpeg를 설치하거나 FFMPEG_PATH를 지정하세요.")
+
+    # 이미지 슬롯과 같게, 화면을 꽉 채운 뒤 중앙 기준으로 자릅니다.
+    video_filter = (
+        f"scale={width}:{height}:force_original_aspect_ratio=increase,"
+        f"crop={width}:{height},fps={fps:g},format=yuv422p10le"
+    )
+    # 다른 프로세스가 같은 프록시를 만드는 중이어도 겹치지 않는 임시 이름을 씁니다.
+    tmp_target = f"{target}.{uuid.uuid4().hex[:8]}.tmp.mov"
+    try:
+        _run([
+            ffmpeg, "-y", "-v", "error", "-i", source,
+            "-vf", video_filter,
+            "-c:v", "prores_ks", "-profile:v", "0",
+            "-c:a", "pcm_s16le",
+            tmp_target,
+        ], TRANSCODE_TIMEOUT)
+        os.replace(tmp_target, target)
+    except BaseException:
+        if os.path.exists(tmp_target):
+            os.remove(tmp_target)
+        raise
+    return target
+
+
+def _prepare(source, cache_dir, key, width, height, fps):
+    """프로브 → (필요하면) 프록시 변환 → 메타데이터 캐시 저장까지 수행합니다."""
+    meta_path = os.path.join(cache_dir, f"proxy_{key}.json")
+    if os.path.exists(meta_path):
+        with open(meta_path, "r", encoding="utf-8") as handle:
+            result = json.load(handle)
+        if not result["proxy"] or os.path.exists(result["proxy"]):
+            # 캐시 정리는 마지막 사용 시각(mtime) 기준이므로 사용할 때마다 갱신합니다.
+            for path in (meta_path, result["proxy"]):
+                if path:
+                    os.utime(path)
+            result["cached"] = True
+            return result
+
+    source_meta = probe_media(source)
+    reasons = proxy_reasons(source_meta, width, height, fps)
+    result = {
+        "source": source_meta,
+        "proxy": None,
+        "proxyReasons": reasons,
+        # AE에서 레이어 길이를 정할 때 쓰는 값 (프록시가 있으면 프록시 기준)
+        "width": source_meta["width"],
+        "height": source_meta["height"],
+        "fps": source_meta["fps"],
+        "duration": source_meta["duration"],
+        "frames": source_meta["frames"],
+    }
+
+    if reasons:
+        proxy_path = transcode_proxy(source, os.path.join(cache_dir, f"proxy_{key}.mov"), width, height, fps)
+        result.update({
+            "proxy": proxy_path,
+            "width": width,
+            "height": height,
+            "fps": fps,
+            "frames": int(round(source_meta["duration"] * fps)),
+        })
+        print(f"[INFO] Proxy created: {os.path.basename(proxy_path)} ({', '.join(reasons)})")
+
+    tmp_meta = f"{meta_path}.{uuid.uuid4().hex[:8]}.tmp"
+    with open(tmp_meta, "w", encoding="utf-8") as handle:
+        json.dump(result, handle)
+    os.replace(tmp_meta, meta_path)
+    result["cached"] = False
+    return result
+
+
+def submit_video(source, cache_dir, width=TEMPLATE_WIDTH, height=TEMPLATE_HEIGHT, fps=TEMPLATE_FPS):
+    """워커 풀에 프록시 작업을 넣고 Future를 돌려줍니다 (같은 원본은 작업을 공유)."""
+    os.makedirs(cache_dir, exist_ok=True)
+    key = _source_key(source, width, height, fps)
+    created = False
+    with _jobs_lock:
+        future = _jobs.get(key)
+        if future is None:
+            future = _executor.submit(_prepare, source, cache_dir, key, width, height, fps)
+            _jobs[key] = future
+            created = True
+    if created:
+        # 이미 끝난 Future면 콜백이 바로 실행되므로 락 밖에서 등록합니다.
+        future.add_done_callback(lambda _: _forget_job(key))
+    return future
+
+
+def _forget_job(key):
+    """완료된 작업은 디스크 캐시로 충분하므로 메모리에서 지웁니다."""
+    with _jobs_lock:
+        future = _jobs.get(key)
+        if future is not None and future.done():
+            del _jobs[key]
+
+
+def prepare_video(source, cache_dir, timeout=TRANSCODE_TIMEOUT, **template):
+    """영상을 템플릿 규격에 맞게 준비하고 메타데이터를 돌려줍니다."""
+    return submit_video(source, cache_dir, **template).result(timeout=timeout)
+
+
+def _cache_entries(cache_dir, now):
+    """캐시 파일을 키별로 묶어 {키: (마지막 사용 시각, 전체 크기, 파일 목록)}으로 돌려줍니다.
+
+    작업 중인 키와 변환 중일 수 있는 임시 파일은 제외하고, 오래된 임시 파일은 정리 대상에 넣습니다.
+    """
+    with _jobs_lock:
+        active = set(_jobs)
+    entries = {}
+    for filename in os.listdir(cache_dir):
+        if not filename.startswith("proxy_"):
+            continue
+        key = filename[len("proxy_"):].split(".", 1)[0]
+        path = os.path.join(cache_dir, filename)
+        if key in active or not os.path.isfile(path):
+            continue
+        mtime = os.path.getmtime(path)
+        if filename.endswith((".tmp", ".tmp.mov")):
+            # 다른 프로세스가 변환 중일 수 있으므로 변환 제한 시간이 지난 것만 지웁니다.
+            if now - mtime <= TRANSCODE_TIMEOUT:
+                continue
+            mtime = 0
+        last_used, size, paths = entries.get(key, (0, 0, []))
+        entries[key] = (max(last_used, mtime), size + os.path.getsize(path), paths + [path])
+    return entries
+
+
+def cleanup_proxy_cache(cache_dir, max_age_hours=None, max_mb=None, min_interval=CACHE_CLEANUP_INTERVAL):
+    """오래 쓰지 않은 프록시(.mov)와 메타데이터(.json)를 지우고, 전체 크기를 한도 안으로 줄입니다."""
+    max_age = (max_age_hours or PROXY_CACHE_HOURS) * 3600
+    max_bytes = (max_mb or PROXY_CACHE_MAX_MB) * 1024 * 1024
+    now = time.time()
+    # 여러 요청이 동시에 호출해도 한 스레드만, min_interval에 한 번만 실행합니다.
+    if not os.path.isdir(cache_dir) or not _cache_cleanup_lock.acquire(blocking=False):
+        return
+    try:
+        if now - _last_cache_cleanup.get(cache_dir, 0) < min_interval:
+            return
+        _last_cache_cleanup[cache_dir] = now
+        entries = sorted(_cache_entries(cache_dir, now).items(), key=lambda item: item[1][0])
+        total = sum(size for _, (_, size, _) in entries)
+        for key, (last_used, size, paths) in entries:
+            if now - last_used <= max_age and total <= max_bytes:
+                continue
+            # 메타데이터를 먼저 지워, 남은 .mov를 캐시로 잘못 쓰지 않게 합니다.
+            for path in sorted(paths, key=lambda path: not path.endswith(".json")):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                except OSError as exc:
+                    # AE가 열고 있는 파일 등은 다음 정리 때 다시 시도합니다.
+                    print(f"[WARN] Failed to remove proxy file {os.path.basename(path)}: {exc}")
+            total -= size
+            print(f"[INFO] Removed cached proxy: proxy_{key}")
+    except Exception as exc:
+        print(f"[ERROR] Failed to cleanup proxy cache: {exc}")
+    finally:
+        _cache_cleanup_lock.release()
@@ -0,0 +1,81 @@
+"""베네핏 추출 벤치마크: 기존 정규식 체인 vs benefits.extract_benefits.
+
+실행: python tests/bench_benefits.py > bench_output.txt
+"""
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from server import benefits  # noqa: E402
+
+
+# ---- 기존 crawler.py 체인 (_normalize_lines → _expand_sentences → _pick_benefits) ----
+def legacy_split_benefits(text, limit=5):
+    raw_lines = [line.strip() for line in text.replace("\r", "\n").split("\n")]
+    raw_lines = [line for line in raw_lines if line]
+    merged = []
+    for line in raw_lines:
+        if not merged:
+            merged.append(line)
+            continue
+        prev = merged[-1]
+        prev_end = prev[-1] if prev else ""
+        if prev_end not in ".!?" and re.match(r"^[a-z]", line):
+            merged[-1] = f"{prev} {line}"
+        else:
+            merged.append(line)
+
+    sentences = []
+    for line in merged:
+        if len(line) > 140:
+            parts = re.split(r"(?<=[.!?])\s+", line)
+            sentences.extend([p.strip() for p in parts if p.strip()])
+        else:
+            sentences.append(line)
+
+    cleaned = []
+    for item in sentences:
+        piece = item.strip()
+        if len(piece) < 8 or len(piece) > 160:
+            continue
+        cleaned.append(piece)
+        if len(cleaned) >= limit:
+            break
+    return cleaned
+
+
+PARAGRAPH = (
+    "LANEIGE 워터 슬리핑 마스크는 자는 동안 피부에 수분을 채워주고\n"
+    "아침까지 촉촉함을 유지합니다.피부 장벽을 강화해 72시간 보습 효과가 지속됩니다.\n"
+    "• 칙칙한 피부톤을 맑고 생기있게 개선합니다.\n"
+    "This lightweight gel cream hydrates\nskin for 24 hours and calms visible redness. "
+    "Dermatologist tested for sensitive skin.\n"
+    "전성분: 정제수, 글리세린, 부틸렌글라이콜\n"
+)
+
+
+def bench(func, text, rounds=20):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        func(text)
+    return (time.perf_counter() - started) / rounds * 1000
+
+
+def main():
+    print(f"{'size(KB)':>9} {'legacy(ms)':>11} {'engine(ms)':>11} {'engine/KB':>10}")
+    for repeat in (1, 4, 16, 64, 256):
+        text = PARAGRAPH * repeat
+        size_kb = len(text.encode("utf-8")) / 1024
+        legacy = bench(legacy_split_benefits, text)
+        engine = bench(benefits.extract_benefits, text)
+        print(f"{size_kb:9.1f} {legacy:11.3f} {engine:11.3f} {engine / size_kb:10.4f}")
+
+    print("\nlegacy:", legacy_split_benefits(PARAGRAPH))
+    print("engine:", benefits.extract_benefits(PARAGRAPH))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import time
+
+from server import benefits
+
+
+KOREAN_DESCRIPTION = """LANEIGE 워터 슬리핑 마스크는 자는 동안 피부에 수분을 채워주고
+아침까지 촉촉함을 유지합니다.피부 장벽을 강화해 72시간 보습 효과가 지속됩니다.
+• 칙칙한 피부톤을 맑고 생기있게 개선합니다.
+• 칙칙한 피부톤을 맑고 생기 있게 개선합니다!
+전성분: 정제수, 글리세린"""
+
+
+def test_segments_korean_sentences_and_joins_broken_lines():
+    sentences = benefits.segment_sentences(KOREAN_DESCRIPTION)
+
+    assert sentences[0] == "LANEIGE 워터 슬리핑 마스크는 자는 동안 피부에 수분을 채워주고 아침까지 촉촉함을 유지합니다."
+    assert sentences[1] == "피부 장벽을 강화해 72시간 보습 효과가 지속됩니다."
+    assert sentences[2] == "칙칙한 피부톤을 맑고 생기있게 개선합니다."
+
+
+def test_extract_ranks_claims_first_and_drops_duplicates_and_boilerplate():
+    result = benefits.extract_benefits(KOREAN_DESCRIPTION)
+
+    assert result[0] == "피부 장벽을 강화해 72시간 보습 효과가 지속됩니다."
+    assert len([item for item in result if item.startswith("칙칙한")]) == 1
+    assert not any("전성분" in item for item in result)
+
+
+def test_english_lines_are_joined_on_lowercase_continuation():
+    text = "This cream hydrates\nskin for 24 hours and calms redness.\nShipping info: 3 days"
+
+    assert benefits.extract_benefits(text) == ["This cream hydrates skin for 24 hours and calms redness."]
+
+
+def test_extraction_scales_linearly():
+    base = KOREAN_DESCRIPTION + "\n"
+
+    def timed(repeat):
+        text = base * repeat
+        started = time.perf_counter()
+        benefits.extract_benefits(text)
+        return time.perf_counter() - started
+
+    small = min(timed(10) for _ in range(3))
+    large = min(timed(160) for _ in range(3))
+
+    # 입력이 16배일 때 시간이 제곱(256배) 근처로 늘지 않아야 합니다.
+    assert large < small * 64
@@ -0,0 +1,63 @@
+import json
+
+from server import command_schema
+
+
+def test_schema_is_derived_from_host_functions():
+    schema = command_schema.load_command_schema()
+
+    assert set(schema) >= {"createComposition", "createTextLayer", "applyEffect"}
+    assert schema["createTextLayer"]["properties"]["position"] == "Array"
+    assert schema["setLayerKeyframe"]["required"] == [
+        "compIndex", "layerIndex", "propertyName", "timeInSeconds", "value"
+    ]
+
+
+def test_valid_batch_passes():
+    commands = [
+        {"command": "createComposition", "args": {"name": "Main", "width": 1920}},
+        {"command": "createTextLayer", "args": {"text": "Hi", "position": [960, 540]}},
+    ]
+    normalized, errors = command_schema.validate_command_batch(commands)
+
+    assert errors == []
+    assert normalized == commands
+
+
+def test_invalid_batch_reports_errors():
+    commands = [
+        {"command": "deleteEverything", "args": {}},
+        {"command": "createTextLayer", "args": {"text": 3, "glow": True}},
+        {"command": "applyEffect", "args": {}},
+        {"command": "setLayerExpression", "args": {"compIndex": 1}},
+    ]
+    _, errors = command_schema.validate_command_batch(commands)
+
+    assert any("deleteEverything" in error for error in errors)
+    assert any("text는 string" in error for error in errors)
+    assert any("glow" in error for error in errors)
+    assert any("effectName 또는 effectMatchName" in error for error in errors)
+    assert any("expressionString" in error for error in errors)
+
+
+def test_empty_batch_is_rejected():
+    _, errors = command_schema.validate_command_batch([])
+    assert errors
+
+
+def test_batch_script_round_trips_as_string_literal():
+    commands = [{"command": "createTextLayer", "args": {"text": "안녕 \"하세요\"\n"}}]
+    script = command_schema.build_batch_script(commands)
+
+    assert script.startswith("executeCommandBatch(")
+    literal = script[len("executeCommandBatch("):-1]
+    assert json.loads(json.loads(literal)) == commands
+
+
+def test_description_includes_argument_types_and_formats():
+    text = command_schema.describe_commands()
+
+    assert "- createComposition(name?, width?" in text
+    # 다른 색상 인자와 형식이 다른 인자도 JSDoc 설명 그대로 전달됩니다.
+    assert "    backgroundColor: Object - 배경색 {r, g, b} (0-255)" in text
+    assert "    fillColor: Array - 채우기 색상 [r, g, b] (0-1) (기본값: [1, 0, 0])" in text
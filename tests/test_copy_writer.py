@@ -0,0 +1,49 @@
+from server import copy_writer
+
+
+def _variant(**overrides):
+    item = {"title": "LANEIGE", "benefit_1": "밤사이 수분 충전", "benefit_2": "피부 장벽 강화",
+            "usage": "가벼운 젤", "cta": "지금 만나보세요"}
+    item.update(overrides)
+    return item
+
+
+def test_text_width_counts_hangul_as_two_columns():
+    assert copy_writer.text_width("abc") == 3
+    assert copy_writer.text_width("수분") == 4
+
+
+def test_fit_slot_text_rewraps_long_lines_by_width():
+    lines, fits = copy_writer.fit_slot_text("자는 동안 피부 깊이 수분을 채워 아침까지 촉촉하게 유지합니다", 3, 20)
+
+    assert fits
+    assert all(copy_writer.text_width(line) <= 20 for line in lines)
+    assert " ".join(lines) == "자는 동안 피부 깊이 수분을 채워 아침까지 촉촉하게 유지합니다"
+
+
+def test_validate_copy_reports_overflow_missing_and_count():
+    payload = {"variants": [_variant(cta=""), _variant(benefit_1="수분 " * 40)]}
+
+    normalized, errors = copy_writer.validate_copy(payload, variants=3)
+
+    assert len(normalized) == 2
+    assert errors[0] == "variants는 3개여야 합니다 (현재 2개)"
+    assert any(error.startswith("variants[0].cta: 문구가 없습니다") for error in errors)
+    assert any(error.startswith("variants[1].benefit_1: 3줄") for error in errors)
+
+
+def test_finalize_truncates_to_line_limit():
+    normalized, _ = copy_writer.validate_copy({"variants": [_variant(title="Water " * 20)]}, variants=1)
+
+    title = copy_writer.finalize_copy(normalized)[0]["title"]
+
+    assert len(title.split("\n")) == copy_writer.SLOT_LIMITS["title"][0]
+    assert title.endswith(copy_writer.ELLIPSIS)
+
+
+def test_prompt_requests_all_slots_and_variant_count():
+    prompt = copy_writer.build_copy_prompt("[Product abc]", variants=3)
+
+    assert prompt.startswith("[Product abc]")
+    assert "exactly 3 variant(s)" in prompt
+    assert all(f'"{slot}"' in prompt for slot in copy_writer.TEXT_SLOTS)
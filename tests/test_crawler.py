@@ -68,3 +68,56 @@ def test_image_urls_normalized():
 def test_fetch_html_rejects_invalid_url():
     with pytest.raises(ValueError):
         crawler.fetch_html("ftp://example.com")
+
+
+def test_crawl_and_store_skips_unchanged_html_and_reports_diffs(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "products.db")
+    pages = {"html": SAMPLE_HTML}
+    parsed = []
+    monkeypatch.setattr(crawler, "fetch_html", lambda url: pages["html"])
+    original_extract = crawler.extract_product_data
+
+    def extract(html, url, probe_images=False, rule=None):
+        parsed.append(url)
+        return original_extract(html, url, probe_images=False, rule=rule)
+
+    monkeypatch.setattr(crawler, "extract_product_data", extract)
+    url = "https://example.com/p/1"
+
+    first = crawler.crawl_and_store(url, db_path)
+    second = crawler.crawl_and_store(url, db_path)
+    pages["html"] = SAMPLE_HTML.replace('"price": "12.34"', '"price": "9.99"')
+    third = crawler.crawl_and_store(url, db_path)
+
+    assert first["status"] == "new"
+    assert second["status"] == "unchanged" and second["skipped"]
+    assert second["product"]["price"] == "12.34"
+    assert third["status"] == "changed"
+    assert third["changes"] == {"price": {"old": "12.34", "new": "9.99"}}
+    # 원본이 같은 두 번째 크롤링은 파싱하지 않습니다.
+    assert parsed == [url, url]
+
+
+def test_probe_dropping_an_image_is_not_reported_as_a_change(monkeypatch, tmp_path):
+    db_path = str(tmp_path / "products.db")
+    pages = {"html": SAMPLE_HTML}
+    monkeypatch.setattr(crawler, "fetch_html", lambda url: pages["html"])
+    original_select = crawler.select_images
+    probe_timeout = {"active": False}
+
+    def select(candidates, limit=12, probe=False):
+        # 두 번째 크롤링에서는 프로브 타임아웃으로 이미지 하나가 빠진 상황을 흉내 냅니다.
+        images = original_select(candidates, limit=limit, probe=False)
+        return images[:-1] if probe_timeout["active"] else images
+
+    monkeypatch.setattr(crawler, "select_images", select)
+    url = "https://example.com/p/1"
+
+    first = crawler.crawl_and_store(url, db_path)
+    probe_timeout["active"] = True
+    pages["html"] = SAMPLE_HTML.replace("</body>", "<!-- ad token --></body>")
+    second = crawler.crawl_and_store(url, db_path)
+
+    assert len(second["product"]["images"]) == len(first["product"]["images"]) - 1
+    assert second["status"] == "unchanged"
+    assert second["changes"] == {}
@@ -0,0 +1,184 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+from PIL import Image, ImageDraw
+
+from server import image_selector
+
+
+def _png(size, variant):
+    img = Image.new("RGB", size, color=(255, 255, 255))
+    draw = ImageDraw.Draw(img)
+    w, h = size
+    if variant == "hero":
+        draw.rectangle([0, 0, w // 2, h], fill=(200, 30, 30))
+        draw.ellipse([w // 2, h // 4, w, h], fill=(20, 20, 160))
+    else:
+        draw.rectangle([0, h // 2, w, h], fill=(20, 160, 20))
+    buf = io.BytesIO()
+    img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def _large_jpeg(size):
+    """PROBE_BYTES보다 큰 JPEG입니다. (노이즈를 섞어 압축이 잘 되지 않게 함)"""
+    w, h = size
+    img = Image.linear_gradient("L").rotate(90).resize(size).convert("RGB")
+    ImageDraw.Draw(img).ellipse([w // 4, h // 4, w * 3 // 4, h], fill=(200, 30, 30))
+    img = Image.blend(img, Image.effect_noise(size, 20).convert("RGB"), 0.15)
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=95)
+    return buf.getvalue()
+
+
+IMAGES = {
+    "/hero_large.png": _png((1600, 900), "hero"),
+    "/hero_small.png": _png((800, 450), "hero"),
+    "/other.png": _png((1200, 1200), "other"),
+    "/icon.png": _png((40, 40), "other"),
+    "/photo_large.jpg": _large_jpeg((1600, 1200)),
+    "/photo_medium.jpg": _large_jpeg((1200, 900)),
+}
+# 같은 파일을 다른 경로로도 제공합니다. (썸네일 없는 CDN의 중복 판단용)
+IMAGES["/photo_copy.jpg"] = IMAGES["/photo_large.jpg"]
+
+
+def _thumbnail(body, width):
+    img = Image.open(io.BytesIO(body))
+    img.thumbnail((width, width))
+    buf = io.BytesIO()
+    img.convert("RGB").save(buf, format="PNG")
+    return buf.getvalue()
+
+
+class ImageHandler(BaseHTTPRequestHandler):
+    """이미지를 제공하는 로컬 서버입니다. ?width=N이면 썸네일을 줍니다 (CDN 흉내)."""
+
+    requests = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        width = parse_qs(parsed.query).get("width")
+        type(self).requests.append((parsed.path, width, self.headers.get("Range")))
+        body = IMAGES.get(parsed.path)
+        if body is None:
+            self.send_response(404)
+            self.end_headers()
+            return
+        if width:
+            body = _thumbnail(body, int(width[0]))
+        self.send_response(200)
+        self.send_header("Content-Type", "image/png")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def image_server():
+    ImageHandler.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ImageHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_canonical_url_strips_cdn_variants():
+    base = "https://cdn.shopify.com/s/files/1/products/serum.jpg"
+
+    assert image_selector.canonical_image_url(base + "?v=123&width=800") == base
+    assert image_selector.canonical_image_url(
+        "https://cdn.shopify.com/s/files/1/products/serum_800x800@2x.jpg?v=9"
+    ) == base
+    assert image_selector.canonical_image_url(
+        "https://assets.imgix.net/a.jpg?id=7&w=300"
+    ) == "https://assets.imgix.net/a.jpg?id=7"
+
+
+def test_canonical_url_keeps_unknown_hosts_untouched():
+    # 알려진 CDN이 아니면 쿼리와 파일명 접미사가 실제 이미지를 가리킬 수 있습니다.
+    for url in (
+        "https://img.example.com/a.jpg?id=7&w=300&v=2",
+        "https://img.example.com/render?size=large&format=png",
+        "https://shop.example.com/files/panel_123x456.jpg",
+    ):
+        assert image_selector.canonical_image_url(url) == url
+
+
+def test_select_without_probe_merges_variants_and_ranks_by_source():
+    candidates = [
+        ("https://cdn.shopify.com/p/tag.jpg", "img"),
+        ("https://cdn.shopify.com/p/hero_1024x1024.jpg", "img"),
+        ("https://cdn.shopify.com/p/hero.jpg?v=1", "json_ld"),
+        ("https://cdn.shopify.com/p/og.jpg", "og"),
+    ]
+
+    # 변형은 하나로 합치되, 돌려주는 URL은 가장 신뢰도 높은 출처의 원본 URL입니다.
+    assert image_selector.select_images(candidates) == [
+        "https://cdn.shopify.com/p/hero.jpg?v=1",
+        "https://cdn.shopify.com/p/og.jpg",
+        "https://cdn.shopify.com/p/tag.jpg",
+    ]
+
+
+def test_select_with_probe_drops_near_duplicates_and_icons(image_server):
+    candidates = [
+        (f"{image_server}/icon.png", "img"),
+        (f"{image_server}/hero_small.png", "og"),
+        (f"{image_server}/other.png", "img"),
+        (f"{image_server}/hero_large.png", "json_ld"),
+    ]
+
+    selected = image_selector.select_images(candidates, probe=True)
+
+    assert selected == [f"{image_server}/hero_large.png", f"{image_server}/other.png"]
+
+
+def test_select_hashes_cdn_thumbnails_instead_of_full_images(image_server, monkeypatch):
+    host = urlparse(image_server).netloc
+    monkeypatch.setattr(image_selector, "THUMBNAIL_PARAMS", {host: {"width": "128"}})
+    candidates = [
+        (f"{image_server}/photo_medium.jpg", "og"),
+        (f"{image_server}/photo_large.jpg", "json_ld"),
+    ]
+
+    selected = image_selector.select_images(candidates, probe=True)
+
+    assert selected == [f"{image_server}/photo_large.jpg"]
+    # 원본 대신 썸네일만 받습니다.
+    assert all(width == ["128"] for _, width, _ in ImageHandler.requests)
+
+
+def test_select_without_thumbnails_probes_ranges_and_dedupes_by_size(image_server):
+    # 썸네일 CDN이 아니고 파일이 PROBE_BYTES보다 커서 앞부분만으로는 해시를 구할 수 없습니다.
+    assert len(IMAGES["/photo_large.jpg"]) > image_selector.PROBE_BYTES
+    candidates = [
+        (f"{image_server}/photo_large.jpg", "json_ld"),
+        (f"{image_server}/photo_copy.jpg", "img"),
+        (f"{image_server}/photo_medium.jpg", "og"),
+    ]
+
+    selected = image_selector.select_images(candidates, probe=True)
+
+    # 해상도/파일 크기가 같은 사본만 빠지고, 크기가 다른 변형은 해시가 없으므로 남습니다.
+    assert selected == [f"{image_server}/photo_large.jpg", f"{image_server}/photo_medium.jpg"]
+    assert all(header == f"bytes=0-{image_selector.PROBE_BYTES - 1}" for _, _, header in ImageHandler.requests)
+
+
+def test_perceptual_hash_is_stable_across_sizes():
+    large = Image.open(io.BytesIO(IMAGES["/hero_large.png"]))
+    small = Image.open(io.BytesIO(IMAGES["/hero_small.png"]))
+    other = Image.open(io.BytesIO(IMAGES["/other.png"]))
+
+    same = image_selector._hamming(image_selector.perceptual_hash(large), image_selector.perceptual_hash(small))
+    different = image_selector._hamming(image_selector.perceptual_hash(large), image_selector.perceptual_hash(other))
+
+    assert same <= image_selector.DUPLICATE_DISTANCE
+    assert different > image_selector.DUPLICATE_DISTANCE
@@ -1,4 +1,10 @@
+import hashlib
 import io
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 from PIL import Image
@@ -77,3 +83,237 @@ def test_download_rejects_too_large(monkeypatch, tmp_path):
         media_utils.download_and_prepare_media(
             "https://example.com/video.mp4", "video", str(tmp_path)
         )
+
+
+VIDEO_BYTES = os.urandom(3 * 1024 * 1024 + 123)
+
+
+class RangeHandler(BaseHTTPRequestHandler):
+    """Range 요청을 지원하는 로컬 HTTP 서버 (테스트용)."""
+
+    requested_ranges = []
+    fail_ranges_once = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        header = self.headers.get("Range")
+        if not header:
+            self.send_response(200)
+            self.send_header("Content-Type", "video/mp4")
+            self.send_header("Content-Length", str(len(VIDEO_BYTES)))
+            self.send_header("Accept-Ranges", "bytes")
+            self.end_headers()
+            self.wfile.write(VIDEO_BYTES)
+            return
+
+        start, end = (int(value) for value in header.split("=")[1].split("-"))
+        type(self).requested_ranges.append((start, end))
+        body = VIDEO_BYTES[start:end + 1]
+        self.send_response(206)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Content-Range", f"bytes {start}-{end}/{len(VIDEO_BYTES)}")
+        self.end_headers()
+        if start in type(self).fail_ranges_once:
+            # 연결이 중간에 끊긴 상황을 흉내 냅니다.
+            type(self).fail_ranges_once.discard(start)
+            self.wfile.write(body[:1000])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def range_server():
+    RangeHandler.requested_ranges = []
+    RangeHandler.fail_ranges_once = set()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/clip.mp4"
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_video_in_parallel_ranges(range_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(media_utils, "MIN_SEGMENT_BYTES", 512 * 1024)
+    expected = hashlib.sha256(VIDEO_BYTES).hexdigest()
+
+    filename, filepath = media_utils.download_and_prepare_media(
+        range_server, "video", str(tmp_path), expected_sha256=expected
+    )
+
+    assert filename.endswith(".mp4")
+    assert open(filepath, "rb").read() == VIDEO_BYTES
+    assert len(RangeHandler.requested_ranges) == media_utils.DEFAULT_SEGMENTS
+    assert not [name for name in os.listdir(tmp_path) if name.endswith((".part", ".json"))]
+
+
+def test_download_video_resumes_after_dropped_segment(range_server, monkeypatch, tmp_path):
+    monkeypatch.setattr(media_utils, "MIN_SEGMENT_BYTES", 512 * 1024)
+    segments = media_utils._plan_segments(len(VIDEO_BYTES), media_utils.DEFAULT_SEGMENTS)
+    dropped_start = segments[1][0]
+    RangeHandler.fail_ranges_once = {dropped_start}
+
+    with pytest.raises(RuntimeError):
+        media_utils.download_and_prepare_media(range_server, "video", str(tmp_path))
+
+    RangeHandler.requested_ranges = []
+    _, filepath = media_utils.download_and_prepare_media(range_server, "video", str(tmp_path))
+
+    assert open(filepath, "rb").read() == VIDEO_BYTES
+    # 완료된 구간은 다시 받지 않고, 끊긴 구간만 이어서 받습니다.
+    assert len(RangeHandler.requested_ranges) == 1
+    assert RangeHandler.requested_ranges[0][0] >= dropped_start
+    assert RangeHandler.requested_ranges[0][1] == segments[1][1]
+
+
+class IgnoreRangeHandler(RangeHandler):
+    """Accept-Ranges: bytes를 보내면서 Range 헤더는 무시하고 항상 200을 주는 서버입니다."""
+
+    get_count = 0
+
+    def do_GET(self):
+        type(self).get_count += 1
+        self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Content-Length", str(len(VIDEO_BYTES)))
+        self.send_header("Accept-Ranges", "bytes")
+        self.end_headers()
+        self.wfile.write(VIDEO_BYTES)
+
+
+def test_download_video_falls_back_when_server_ignores_range(monkeypatch, tmp_path):
+    monkeypatch.setattr(media_utils, "MIN_SEGMENT_BYTES", 512 * 1024)
+    IgnoreRangeHandler.get_count = 0
+    server = ThreadingHTTPServer(("127.0.0.1", 0), IgnoreRangeHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        _, filepath = media_utils.download_and_prepare_media(
+            f"http://127.0.0.1:{server.server_address[1]}/clip.mp4", "video", str(tmp_path),
+            expected_sha256=hashlib.sha256(VIDEO_BYTES).hexdigest(),
+        )
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert open(filepath, "rb").read() == VIDEO_BYTES
+    # 헤더 확인 요청 + 무시된 구간 요청 + 순차 다운로드용 새 GET
+    assert IgnoreRangeHandler.get_count >= 3
+    assert not [name for name in os.listdir(tmp_path) if name.endswith((".part", ".json", ".lock"))]
+
+
+def test_download_video_rejects_checksum_mismatch(range_server, tmp_path):
+    with pytest.raises(RuntimeError):
+        media_utils.download_and_prepare_media(
+            range_server, "video", str(tmp_path), expected_sha256="0" * 64
+        )
+
+    assert not os.listdir(tmp_path)
+
+
+def test_download_video_streams_without_range_support(monkeypatch, tmp_path):
+    response = DummyResponse(
+        content=b"v" * 300000,
+        headers={"Content-Type": "video/mp4", "Content-Length": "300000"},
+    )
+    monkeypatch.setattr(media_utils.requests, "get", lambda *args, **kwargs: response)
+
+    _, filepath = media_utils.download_and_prepare_media(
+        "https://example.com/video.mp4", "video", str(tmp_path)
+    )
+
+    assert os.path.getsize(filepath) == 300000
+
+
+def _age(path, seconds):
+    old = os.path.getmtime(path) - seconds
+    os.utime(path, (old, old))
+
+
+def test_cleanup_skips_files_still_being_written(tmp_path):
+    finished = tmp_path / "downloaded_old.jpg"
+    active = tmp_path / "downloaded_active.jpg"
+    part = tmp_path / "video_abc.part"
+    lock = tmp_path / "video_abc.part.lock"
+    for path in (finished, active, part, lock):
+        path.write_bytes(b"x")
+    for path in (finished, active, part):
+        _age(path, 2 * 3600)
+
+    with media_utils.writing(str(active)):
+        media_utils.cleanup_old_images(str(tmp_path), hours=1, min_interval=0)
+
+    assert not finished.exists()
+    assert active.exists()
+    # 다른 프로세스가 잠금을 잡고 이어받는 중인 파일
+    assert part.exists() and lock.exists()
+
+
+def test_cleanup_runs_at_most_once_per_interval(tmp_path):
+    old = tmp_path / "downloaded_old.jpg"
+    media_utils.cleanup_old_images(str(tmp_path), hours=1, min_interval=60)
+    old.write_bytes(b"x")
+    _age(old, 2 * 3600)
+
+    media_utils.cleanup_old_images(str(tmp_path), hours=1, min_interval=60)
+
+    assert old.exists()
+
+
+def test_atomic_write_leaves_no_partial_file_on_error(tmp_path):
+    target = tmp_path / "out.jpg"
+
+    with pytest.raises(ValueError):
+        with media_utils.atomic_write(str(target)) as tmp_name:
+            with open(tmp_name, "wb") as handle:
+                handle.write(b"half")
+            raise ValueError("encode failed")
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_second_download_of_same_url_does_not_share_partial_file(tmp_path):
+    url = "https://example.com/clip.mp4"
+    part_path, _ = media_utils._partial_paths(url, str(tmp_path / "a.mp4"))
+    # 다른 요청이 이미 같은 URL을 받는 중입니다.
+    open(part_path + ".lock", "w").close()
+    response = DummyResponse(content=b"video-bytes", headers={"Content-Length": "11"})
+
+    media_utils.fetch_video(url, str(tmp_path / "b.mp4"), response, 1024)
+
+    assert (tmp_path / "b.mp4").read_bytes() == b"video-bytes"
+    assert not os.path.exists(part_path)
+    assert sorted(os.listdir(tmp_path)) == ["b.mp4", os.path.basename(part_path) + ".lock"]
+
+
+def test_media_filenames_are_unique():
+    names = {media_utils.unique_filename("downloaded", ".jpg") for _ in range(1000)}
+
+    assert len(names) == 1000
+
+
+def test_lock_left_by_dead_process_does_not_block_resume(tmp_path):
+    url = "https://example.com/crashed.mp4"
+    part_path, _ = media_utils._partial_paths(url, str(tmp_path / "a.mp4"))
+    dead = subprocess.Popen([sys.executable, "-c", "pass"])
+    dead.wait()
+    with open(part_path + ".lock", "w") as handle:
+        handle.write(str(dead.pid))
+    response = DummyResponse(content=b"video-bytes", headers={"Content-Length": "11"})
+
+    media_utils.fetch_video(url, str(tmp_path / "a.mp4"), response, 1024)
+
+    # 공용 이어받기 경로를 다시 차지해 받고, 끝나면 잠금도 지웁니다.
+    assert sorted(os.listdir(tmp_path)) == ["a.mp4"]
+
+
+def test_lock_held_by_live_process_is_respected(tmp_path):
+    lock_path = str(tmp_path / "video_x.part.lock")
+    with open(lock_path, "w") as handle:
+        handle.write(str(os.getpid()))
+
+    assert not media_utils._claim(lock_path)
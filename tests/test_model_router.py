@@ -0,0 +1,30 @@
+from server import model_router
+
+
+CONFIG = {"fast": "fast-model", "code": "code-model", "long_prompt_chars": 100}
+
+
+def test_clarification_turns_use_fast_model():
+    assert model_router.select_model(state="idle", config=CONFIG) == "fast-model"
+    assert model_router.select_model(state="clarifying", config=CONFIG) == "fast-model"
+
+
+def test_code_and_confirming_turns_use_code_model():
+    assert model_router.select_model(state="confirming", config=CONFIG) == "code-model"
+    assert model_router.select_model(response_type="code", config=CONFIG) == "code-model"
+
+
+def test_long_prompt_uses_code_model():
+    assert model_router.select_model(state="idle", prompt_size=500, config=CONFIG) == "code-model"
+
+
+def test_load_routing_config_reads_env():
+    config = model_router.load_routing_config({
+        "GEMINI_FAST_MODEL": "a",
+        "GEMINI_CODE_MODEL": "b",
+        "GEMINI_LONG_PROMPT_CHARS": "not-a-number",
+    })
+
+    assert config["fast"] == "a"
+    assert config["code"] == "b"
+    assert config["long_prompt_chars"] == model_router.DEFAULT_LONG_PROMPT_CHARS
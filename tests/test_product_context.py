@@ -0,0 +1,71 @@
+from server import product_context
+
+
+PRODUCT = {
+    "name": "LANEIGE Water Sleeping Mask",
+    "brand": "LANEIGE",
+    "price": "25.00",
+    "currency": "USD",
+    "description": "A lightweight gel texture that feels fresh, not sticky.",
+    "benefits": ["Hydrates  overnight.", "Strengthens the skin barrier.", "Calms redness."],
+    "images": ["https://cdn.example.com/a.jpg", "https://cdn.example.com/b.jpg"],
+}
+
+
+def test_build_fills_template_slots_only():
+    context = product_context.build_product_context(PRODUCT)
+
+    assert context["slots"] == {
+        "title": "LANEIGE Water Sleeping Mask",
+        "benefit_1": "Hydrates overnight",
+        "benefit_2": "Strengthens the skin barrier",
+        "usage": "lightweight, gel, fresh",
+        "cta": "25.00 USD",
+    }
+    assert context["extraBenefits"] == ["Calms redness"]
+    assert context["media"]["hero"] == "https://cdn.example.com/a.jpg"
+    assert context["media"]["texture"] == "https://cdn.example.com/b.jpg"
+
+
+def test_prepared_media_paths_override_image_urls():
+    context = product_context.build_product_context(PRODUCT, media={"hero": "C:/temp/hero.png"})
+
+    assert context["media"]["hero"] == "C:/temp/hero.png"
+    assert context["media"]["benefit_media_1"] == "https://cdn.example.com/b.jpg"
+
+
+def test_register_builds_block_once_per_product(monkeypatch):
+    calls = []
+    original = product_context.build_product_context
+
+    def counting_build(product, media=None):
+        calls.append(product["name"])
+        return original(product, media)
+
+    monkeypatch.setattr(product_context, "build_product_context", counting_build)
+
+    first = product_context.register_product_context(PRODUCT)
+    second = product_context.register_product_context(dict(PRODUCT))
+
+    assert first is second
+    assert len(calls) == 1
+    assert product_context.get_product_context(first["ref"])["block"] == first["block"]
+    assert "benefit_1: Hydrates overnight" in first["block"]
+    assert "description" not in first["block"]
+
+
+def test_different_media_maps_get_separate_refs_and_blocks(tmp_path):
+    db_path = str(tmp_path / "products.db")
+    product = dict(PRODUCT, name="Lip Sleeping Mask")
+
+    first = product_context.register_product_context(product, media={"hero": "C:/a.png"}, db_path=db_path)
+    second = product_context.register_product_context(product, media={"hero": "C:/b.png"}, db_path=db_path)
+    plain = product_context.register_product_context(product, db_path=db_path)
+
+    assert len({first["ref"], second["ref"], plain["ref"]}) == 3
+    assert "media.hero: C:/a.png" in product_context.get_product_context(first["ref"])["block"]
+    assert "media.hero: C:/b.png" in product_context.get_product_context(second["ref"])["block"]
+    assert "C:/" not in plain["block"]
+    # 다른 프로세스가 저장소에서 읽어도 각자의 블록이 그대로입니다.
+    product_context._contexts.clear()
+    assert "media.hero: C:/a.png" in product_context.get_product_context(first["ref"], db_path)["block"]
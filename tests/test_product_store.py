@@ -0,0 +1,55 @@
+from server import product_store
+
+
+def _product(**fields):
+    product = {
+        "url": "https://example.com/p/1",
+        "name": "Water Sleeping Mask",
+        "price": "25.00",
+        "currency": "USD",
+        "benefits": ["Hydrates overnight."],
+        "images": ["https://cdn.example.com/a.jpg"],
+    }
+    product.update(fields)
+    return product
+
+
+def test_diff_reports_changed_fields_only():
+    old = _product()
+    new = _product(price="22.00", images=["https://cdn.example.com/a.jpg", "https://cdn.example.com/b.jpg"])
+
+    changes = product_store.diff_products(old, new)
+
+    assert changes == {
+        "price": {"old": "25.00", "new": "22.00"},
+        "images": {"added": ["https://cdn.example.com/b.jpg"], "removed": []},
+    }
+    assert product_store.diff_products(old, _product(description="ignored")) == {}
+
+
+def test_save_and_get_round_trip(tmp_path):
+    db_path = str(tmp_path / "products.db")
+    product = _product()
+
+    product_store.save_record(db_path, product["url"], "hash-1", product, changed=True)
+    record = product_store.get_record(db_path, product["url"])
+
+    assert record["sourceHash"] == "hash-1"
+    assert record["product"] == product
+    assert record["productHash"] == product_store.product_hash(product)
+    assert product_store.list_urls(db_path) == [product["url"]]
+
+
+def test_unchanged_save_keeps_changed_at(tmp_path):
+    db_path = str(tmp_path / "products.db")
+    product = _product()
+    product_store.save_record(db_path, product["url"], "hash-1", product, changed=True)
+    first = product_store.get_record(db_path, product["url"])
+
+    product_store.save_record(db_path, product["url"], "hash-2", product, changed=False)
+    second = product_store.get_record(db_path, product["url"])
+
+    assert second["sourceHash"] == "hash-2"
+    assert second["changedAt"] == first["changedAt"]
+    assert second["crawledAt"] >= first["crawledAt"]
+    assert product_store.get_record(db_path, "https://example.com/missing") is None
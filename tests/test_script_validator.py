@@ -0,0 +1,84 @@
+from server import script_validator
+
+
+HOST_FUNCTIONS = frozenset(["createTextLayer"])
+
+
+def test_valid_script_passes():
+    code = (
+        'app.beginUndoGroup("Test");\n'
+        "var comp = app.project.activeItem;\n"
+        "function center(c) { return [c.width / 2, c.height / 2]; }\n"
+        "var re = /a[/]b/g;\n"
+        "if (comp && comp instanceof CompItem) {\n"
+        '    createTextLayer({text: "hi", position: center(comp)});\n'
+        "}\n"
+        "app.endUndoGroup();"
+    )
+    report = script_validator.validate_script(code, HOST_FUNCTIONS)
+
+    assert report["valid"], report["errors"]
+    assert report["undoGroups"] == {"begin": 1, "end": 1}
+
+
+def test_syntax_errors_are_reported():
+    report = script_validator.validate_script('var s = "abc;\n', HOST_FUNCTIONS)
+    assert not report["valid"]
+
+    report = script_validator.validate_script("if (a) { b();", HOST_FUNCTIONS)
+    assert any("닫히지 않은" in error for error in report["errors"])
+
+
+def test_es5_syntax_is_rejected():
+    report = script_validator.validate_script("let f = (a) => a;", HOST_FUNCTIONS)
+
+    assert not report["valid"]
+    assert len(report["errors"]) == 2
+
+
+def test_unknown_function_is_flagged():
+    code = 'app.beginUndoGroup("a");\ncreateFancyLayer({});\nalert("x");\napp.endUndoGroup();'
+    report = script_validator.validate_script(code, HOST_FUNCTIONS)
+
+    assert report["errors"] == ["line 2: 정의되지 않은 함수 호출입니다: createFancyLayer()"]
+
+
+def test_unbalanced_undo_group_is_repaired():
+    code = 'app.beginUndoGroup("a");\nvar x = 1;'
+    report = script_validator.validate_script(code, HOST_FUNCTIONS)
+    assert not report["valid"]
+
+    repaired = script_validator.repair_script(code, report)
+    assert script_validator.validate_script(repaired, HOST_FUNCTIONS)["valid"]
+
+
+def test_end_undo_group_in_each_branch_is_only_a_warning():
+    code = (
+        'app.beginUndoGroup("a");\n'
+        "var comp = app.project.activeItem;\n"
+        'if (!comp) {\n    alert("no comp");\n    app.endUndoGroup();\n} else {\n    app.endUndoGroup();\n}'
+    )
+    report = script_validator.validate_script(code, HOST_FUNCTIONS)
+
+    assert report["valid"], report["errors"]
+    assert report["undoGroups"] == {"begin": 1, "end": 2}
+    assert any("endUndoGroup" in warning for warning in report["warnings"])
+
+
+def test_end_undo_group_before_any_begin_is_an_error():
+    report = script_validator.validate_script('app.endUndoGroup();\napp.beginUndoGroup("a");', HOST_FUNCTIONS)
+
+    assert "line 1: beginUndoGroup 없이 endUndoGroup이 호출됩니다" in report["errors"]
+
+
+def test_division_after_postfix_increment_is_not_a_regex():
+    code = 'app.beginUndoGroup("a");\nvar i = 4;\nvar x = i++ / 2;\nvar y = i-- / 2 / 1;\napp.endUndoGroup();'
+
+    assert script_validator.validate_script(code, HOST_FUNCTIONS)["valid"]
+
+
+def test_host_functions_are_loaded():
+    names = script_validator.load_host_functions()
+
+    assert "createComposition" in names
+    assert "executeCommand" in names
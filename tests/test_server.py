@@ -1,8 +1,15 @@
 import importlib.util
+import io
+import json
+import os
+import random
 import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 import pytest
+from PIL import Image
 
 SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
 sys.path.insert(0, str(SERVER_DIR))
@@ -12,6 +19,12 @@ server_module = importlib.util.module_from_spec(spec)
 spec.loader.exec_module(server_module)
 
 
+@pytest.fixture(autouse=True)
+def product_db(monkeypatch, tmp_path):
+    # 테스트가 server/products.db에 기록하지 않도록 합니다.
+    monkeypatch.setattr(server_module, "PRODUCT_DB_PATH", str(tmp_path / "products.db"))
+
+
 @pytest.fixture
 def client():
     server_module.app.testing = True
@@ -31,7 +44,10 @@ def test_crawl_product_success(client, monkeypatch):
         "images": ["https://example.com/a.jpg"],
     }
 
-    monkeypatch.setattr(server_module, "crawl_product_page", lambda url: sample)
+    import crawler
+
+    monkeypatch.setattr(crawler, "fetch_product_source", lambda url: ("html", "<html></html>", None))
+    monkeypatch.setattr(crawler, "parse_product_source", lambda kind, source, url, rule: dict(sample))
 
     res = client.post("/crawl-product", json={"url": "https://example.com/p/1"})
     data = res.get_json()
@@ -39,6 +55,9 @@ def test_crawl_product_success(client, monkeypatch):
     assert res.status_code == 200
     assert data["status"] == "success"
     assert data["product"]["name"] == "Sample"
+    assert data["crawlStatus"] == "new"
+    # 크롤링한 제품은 저장소에 기록되어 /recrawl-products 대상이 됩니다.
+    assert server_module.list_urls(server_module.PRODUCT_DB_PATH) == ["https://example.com/p/1"]
 
 
 def test_crawl_product_missing_url(client):
@@ -49,9 +68,352 @@ def test_crawl_product_missing_url(client):
     assert data["error"] == "Missing product URL"
 
 
+def test_recrawl_products_reports_changed_urls(client, monkeypatch, tmp_path):
+    statuses = {"https://example.com/a": "unchanged", "https://example.com/b": "changed"}
+
+    def fake_crawl_and_store(url, db_path, incremental=True):
+        if url == "https://example.com/c":
+            raise RuntimeError("HTML 다운로드에 실패했습니다.")
+        return {"url": url, "status": statuses[url], "changes": {}}
+
+    monkeypatch.setattr(server_module, "PRODUCT_DB_PATH", str(tmp_path / "products.db"))
+    monkeypatch.setattr(server_module, "crawl_and_store", fake_crawl_and_store)
+
+    res = client.post("/recrawl-products", json={"urls": list(statuses) + ["https://example.com/c"]})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    assert data["changed"] == ["https://example.com/b"]
+    assert data["errors"] == ["https://example.com/c"]
+    assert [item["status"] for item in data["results"]] == ["unchanged", "changed", "error"]
+
+
+def test_recrawl_products_rejects_non_boolean_incremental(client, monkeypatch):
+    calls = []
+    monkeypatch.setattr(server_module, "crawl_and_store", lambda *args, **kwargs: calls.append(args))
+
+    for value in ("false", "0", 0, None):
+        res = client.post("/recrawl-products", json={"urls": ["https://example.com/a"], "incremental": value})
+        assert res.status_code == 400
+        assert res.get_json()["message"] == "incremental must be a boolean"
+    assert calls == []
+
+
 def test_generate_media_requires_prompt(client):
     res = client.post("/generate-media", json={"type": "image"})
     data = res.get_json()
 
     assert res.status_code == 400
     assert data["status"] == "error"
+
+
+class FakeChatSession:
+    def __init__(self, fake):
+        self.fake = fake
+
+    def send_message(self, prompt):
+        self.fake.prompts.append(prompt)
+        return type("Response", (), {"text": self.fake.text})()
+
+
+class FakeGenAI:
+    def __init__(self, text):
+        self.text = text
+        self.models = []
+        self.instructions = []
+        self.prompts = []
+
+    def configure(self, api_key=None):
+        pass
+
+    def GenerativeModel(self, model_name, system_instruction=None):
+        self.models.append(model_name)
+        self.instructions.append(system_instruction)
+        fake = self
+
+        class Model:
+            def start_chat(self, history=None):
+                return FakeChatSession(fake)
+
+            def generate_content(self, prompt, generation_config=None):
+                fake.prompts.append(prompt)
+                # 응답 목록을 주면 호출마다 차례로 돌려줍니다.
+                text = fake.text.pop(0) if isinstance(fake.text, list) else fake.text
+                return type("Response", (), {"text": text})()
+
+        return Model()
+
+
+def test_chat_routes_clarification_to_fast_model(client, monkeypatch):
+    fake = FakeGenAI('{"type": "clarification", "content": "?", "data": {}}')
+    monkeypatch.setattr(server_module, "genai", fake)
+    monkeypatch.setenv("GEMINI_FAST_MODEL", "fast-model")
+    monkeypatch.setenv("GEMINI_CODE_MODEL", "code-model")
+
+    res = client.post("/chat", json={"apiKey": "k", "prompt": "hi", "state": "idle"})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    assert data["model"] == "fast-model"
+    assert fake.models == ["fast-model"]
+
+
+def test_chat_returns_json_error_when_gemini_api_fails(client, monkeypatch):
+    from google.api_core import exceptions as google_exceptions
+
+    fake = FakeGenAI("")
+
+    def fail(self, prompt):
+        raise google_exceptions.PermissionDenied("API key not valid")
+
+    monkeypatch.setattr(server_module, "genai", fake)
+    monkeypatch.setattr(FakeChatSession, "send_message", fail)
+
+    res = client.post("/chat", json={"apiKey": "bad-key", "prompt": "hi"})
+    data = res.get_json()
+
+    assert res.status_code == 500
+    assert data["error"] == "Gemini API 오류"
+    assert "API key not valid" in data["details"]
+
+
+def test_generate_code_routes_to_code_model(client, monkeypatch):
+    fake = FakeGenAI('{"type": "code", "content": "", "data": {"code": "x"}}')
+    monkeypatch.setattr(server_module, "genai", fake)
+    monkeypatch.setenv("GEMINI_CODE_MODEL", "code-model")
+
+    res = client.post("/generate-code", json={"apiKey": "k", "context": {}})
+
+    assert res.status_code == 200
+    assert res.get_json()["model"] == "code-model"
+
+
+def test_generate_code_repairs_invalid_code_once(client, monkeypatch):
+    fake = FakeGenAI('```javascript\napp.beginUndoGroup("a");\nlet x = 1;\napp.endUndoGroup();\n```')
+    monkeypatch.setattr(server_module, "genai", fake)
+
+    res = client.post("/generate-code", json={"apiKey": "k", "context": {}})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    # 최초 생성 1회 + 자동 수정 1회만 호출합니다.
+    assert len(fake.models) == 2
+    assert data["validation"]["valid"] is False
+    assert data["validation"]["repaired"] is False
+
+
+def test_generate_code_commands_mode_returns_batch(client, monkeypatch):
+    fake = FakeGenAI(
+        '```json\n{"type": "commands", "content": "ok", "data": {"commands": '
+        '[{"command": "createTextLayer", "args": {"text": "Hi"}}]}}\n```'
+    )
+    monkeypatch.setattr(server_module, "genai", fake)
+
+    res = client.post("/generate-code", json={"apiKey": "k", "context": {}, "mode": "commands"})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    assert data["type"] == "commands"
+    assert data["validation"]["valid"] is True
+    assert data["commands"] == [{"command": "createTextLayer", "args": {"text": "Hi"}}]
+    assert data["code"].startswith("executeCommandBatch(")
+
+
+def test_prepare_media_returns_video_metadata(client, monkeypatch, tmp_path):
+    filepath = str(tmp_path / "downloaded_1.mp4")
+    media = {"proxy": str(tmp_path / "proxy.mov"), "duration": 4.0, "frames": 120, "fps": 30.0}
+
+    monkeypatch.setattr(
+        server_module, "download_and_prepare_media",
+        lambda url, media_type, temp_dir, expected_sha256=None: ("downloaded_1.mp4", filepath),
+    )
+    monkeypatch.setattr(server_module, "find_tool", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(server_module, "prepare_video", lambda source, cache_dir: media)
+
+    res = client.post("/prepare-media", json={"url": "https://example.com/v.mp4", "type": "video"})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    assert data["media"]["frames"] == 120
+    assert data["importPath"] == media["proxy"]
+
+
+PRODUCT = {
+    "url": "https://example.com/p/1",
+    "name": "Water Sleeping Mask",
+    "brand": "LANEIGE",
+    "price": "25.00",
+    "currency": "USD",
+    "description": "A lightweight gel mask.",
+    "benefits": ["Hydrates overnight.", "Strengthens the skin barrier.", "Calms redness."],
+    "images": ["https://cdn.example.com/a.jpg", "https://cdn.example.com/b.jpg"],
+}
+
+
+def test_product_context_is_attached_by_reference(client, monkeypatch):
+    fake = FakeGenAI('{"type": "code", "content": "", "data": {"code": "x"}}')
+    monkeypatch.setattr(server_module, "genai", fake)
+
+    registered = client.post("/product-context", json={"product": PRODUCT}).get_json()
+    ref = registered["productRef"]
+    client.post("/chat", json={"apiKey": "k", "prompt": "make it", "productRef": ref})
+    client.post("/generate-code", json={"apiKey": "k", "context": {}, "productRef": ref})
+
+    assert registered["slots"]["title"] == "LANEIGE Water Sleeping Mask"
+    # 제품 블록은 /chat, /generate-code 모두 프롬프트 맨 앞에 붙습니다.
+    assert fake.instructions[0].startswith(registered["block"])
+    assert fake.prompts[1].startswith(registered["block"])
+    # 제품 설명 원문은 프롬프트에 들어가지 않습니다.
+    assert "A lightweight gel mask" not in fake.instructions[0]
+
+
+def test_unknown_product_ref_is_rejected(client):
+    res = client.post("/chat", json={"apiKey": "k", "prompt": "hi", "productRef": "missing"})
+
+    assert res.status_code == 400
+    assert res.get_json()["error"] == "알 수 없는 productRef입니다"
+
+
+def test_generate_copy_returns_all_slots_for_each_variant(client, monkeypatch):
+    variants = [
+        {"title": "LANEIGE\nWater Sleeping Mask", "benefit_1": "밤사이 수분 충전", "benefit_2": "피부 장벽 강화",
+         "usage": "가벼운 젤 텍스처", "cta": "지금 25달러"},
+        {"title": "LANEIGE", "benefit_1": "자는 동안 촉촉하게", "benefit_2": "붉은기 진정",
+         "usage": "산뜻한 마무리", "cta": "오늘 만나보세요"},
+    ]
+    fake = FakeGenAI(json.dumps({"variants": variants}, ensure_ascii=False))
+    monkeypatch.setattr(server_module, "genai", fake)
+
+    res = client.post("/generate-copy", json={"apiKey": "k", "product": PRODUCT, "variants": 2})
+    data = res.get_json()
+
+    assert res.status_code == 200
+    assert len(fake.prompts) == 1
+    assert data["variants"] == variants
+    assert data["validation"] == {"valid": True, "errors": [], "repaired": False}
+
+
+def test_generate_copy_asks_once_to_shorten_overlong_slots(client, monkeypatch):
+    too_long = {"title": "T", "benefit_1": "아주 긴 베네핏 문구 " * 10, "benefit_2": "B", "usage": "U", "cta": "C"}
+    fixed = dict(too_long, benefit_1="짧게 줄인 베네핏")
+    fake = FakeGenAI([json.dumps({"variants": [too_long]}), json.dumps({"variants": [fixed]})])
+    monkeypatch.setattr(server_module, "genai", fake)
+
+    res = client.post("/generate-copy", json={"apiKey": "k", "product": PRODUCT})
+    data = res.get_json()
+
+    assert len(fake.prompts) == 2
+    assert "benefit_1" in fake.prompts[1].split("failed validation")[1]
+    assert data["variants"][0]["benefit_1"] == "짧게 줄인 베네핏"
+    assert data["validation"]["repaired"] is True
+
+
+def test_generate_copy_rejects_too_many_variants(client):
+    res = client.post("/generate-copy", json={"apiKey": "k", "product": PRODUCT, "variants": 20})
+
+    assert res.status_code == 400
+
+
+class EchoGenAI:
+    """요청별 클라이언트(API 키)와 프롬프트를 그대로 돌려주는 가짜 Gemini입니다."""
+
+    def GenerativeModel(self, model_name, system_instruction=None, **kwargs):
+        class Model:
+            _client = None
+
+            def start_chat(self, history=None):
+                return self
+
+            def send_message(self, prompt):
+                # 요청들이 서로 끼어들도록 잠깐 쉽니다.
+                time.sleep(random.uniform(0, 0.01))
+                content = f"{self._client}|{prompt}"
+                return type("Response", (), {"text": json.dumps({"type": "clarification", "content": content})})()
+
+        return Model()
+
+
+class ImageResponse:
+    def __init__(self, content):
+        self.content = content
+        self.headers = {"Content-Type": "image/png", "Content-Length": str(len(content))}
+        self.status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+def _png_bytes(color):
+    buf = io.BytesIO()
+    Image.new("RGB", (64, 36), color=color).save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def test_parallel_requests_do_not_cross_talk_or_lose_files(monkeypatch, tmp_path):
+    temp_dir = tmp_path / "temp_images"
+    temp_dir.mkdir()
+    monkeypatch.setattr(server_module, "TEMP_IMG_DIR", str(temp_dir))
+    monkeypatch.setattr(server_module, "genai", EchoGenAI())
+    # 실제 클라이언트 대신 API 키를 표시하는 객체를 요청마다 붙입니다.
+    monkeypatch.setattr(server_module, "gemini_client", lambda api_key: f"client:{api_key}")
+
+    def fake_crawl(url, db_path, incremental=True):
+        time.sleep(random.uniform(0, 0.01))
+        product = dict(PRODUCT, url=url, name=f"name-{url.rsplit('/', 1)[1]}")
+        return {"url": url, "status": "new", "skipped": False, "product": product, "changes": {}}
+
+    monkeypatch.setattr(server_module, "crawl_and_store", fake_crawl)
+    images = {i: _png_bytes((i * 20 % 256, 0, 0)) for i in range(8)}
+    monkeypatch.setattr(
+        server_module.requests, "get",
+        lambda url, **kwargs: ImageResponse(images[int(url.rsplit("/", 1)[1].split(".")[0])]),
+    )
+    server_module.app.testing = True
+
+    def call(index):
+        client = server_module.app.test_client()
+        kind = index % 3
+        if kind == 0:
+            res = client.post("/chat", json={"apiKey": f"key-{index}", "prompt": f"prompt-{index}"})
+            assert res.get_json()["content"] == f"client:key-{index}|prompt-{index}"
+        elif kind == 1:
+            res = client.post("/crawl-product", json={"url": f"https://example.com/p/{index}"})
+            assert res.get_json()["product"]["name"] == f"name-{index}"
+        else:
+            res = client.post("/prepare-media", json={"url": f"https://example.com/{index % 8}.png"})
+            data = res.get_json()
+            assert data["status"] == "success", data
+            return data["filepath"]
+        return None
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        paths = [path for path in pool.map(call, range(90)) if path]
+
+    assert len(paths) == 30
+    assert len(set(paths)) == 30
+    assert all(os.path.getsize(path) > 0 for path in paths)
+    # 임시 이름(.tmp)으로 남은 파일이 없어야 합니다.
+    assert sorted(os.listdir(temp_dir)) == sorted(os.path.basename(path) for path in paths)
+
+
+def test_installed_sdk_uses_the_client_attached_by_new_model():
+    # new_model은 비공개 속성 GenerativeModel._client에 의존하므로 설치된 SDK에서 실제로 쓰이는지 확인합니다.
+    from google.ai import generativelanguage as glm
+
+    class RecordingClient:
+        def __init__(self):
+            self.requests = []
+
+        def generate_content(self, request, **kwargs):
+            self.requests.append(request)
+            return glm.GenerateContentResponse(
+                candidates=[{"content": {"parts": [{"text": "ok"}], "role": "model"}}]
+            )
+
+    client = RecordingClient()
+    with server_module.app.test_request_context():
+        server_module.g.gemini_client = client
+        model = server_module.new_model("test-model", system_instruction="sys")
+
+    assert model.start_chat(history=[]).send_message("hi").text == "ok"
+    assert client.requests[0].model == "models/test-model"
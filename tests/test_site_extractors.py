@@ -0,0 +1,104 @@
+from server import crawler, site_extractors
+
+
+SHOPIFY_PAYLOAD = {
+    "product": {
+        "title": "Water Sleeping Mask",
+        "vendor": "LANEIGE",
+        "body_html": "<p>Hydrates skin overnight for a plump look.</p><ul><li>Soothes dull skin tone</li></ul>",
+        "variants": [{"price": "32.00", "sku": "LN-001"}],
+        "images": [
+            {"src": "https://cdn.shopify.com/s/files/1/products/mask.jpg?v=1"},
+            {"src": "https://cdn.shopify.com/s/files/1/products/mask_1024x1024.jpg?v=1"},
+        ],
+    }
+}
+
+
+class JsonResponse:
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+def test_find_rule_matches_host_and_parent_domain():
+    assert site_extractors.find_rule("https://global.amoremall.com/products/x")["name"] == "amoremall"
+    assert site_extractors.find_rule("https://shop.myshopify.com/products/x")["name"] == "shopify"
+    assert site_extractors.find_rule("https://example.com/p/1") is site_extractors.GENERIC_RULE
+
+
+def test_register_site_adds_new_shop_without_core_changes(monkeypatch):
+    monkeypatch.setattr(site_extractors, "_REGISTRY", dict(site_extractors._REGISTRY))
+    rule = site_extractors.make_rule("acme", image_hosts=("cdn.acme.test",))
+    site_extractors.register_site(["acme.test"], rule)
+
+    assert site_extractors.find_rule("https://www.acme.test/item/1") is rule
+
+
+def test_shopify_json_endpoint():
+    assert site_extractors.shopify_json_endpoint(
+        "https://shop.myshopify.com/products/water-mask?variant=1"
+    ) == "https://shop.myshopify.com/products/water-mask.json"
+    assert site_extractors.shopify_json_endpoint("https://shop.myshopify.com/collections/all") is None
+
+
+def test_crawl_shopify_uses_json_endpoint_without_html(monkeypatch):
+    requested = []
+
+    def fake_get(url, **kwargs):
+        requested.append(url)
+        if url.endswith("/meta.json"):
+            return JsonResponse({"name": "LANEIGE", "currency": "USD"})
+        return JsonResponse(SHOPIFY_PAYLOAD)
+
+    def no_html(url):
+        raise AssertionError("HTML should not be fetched")
+
+    original_select = crawler.select_images
+    monkeypatch.setattr(crawler.requests, "get", fake_get)
+    monkeypatch.setattr(crawler, "_shop_currencies", {})
+    monkeypatch.setattr(crawler, "fetch_html", no_html)
+    monkeypatch.setattr(
+        crawler, "select_images", lambda candidates, limit, probe: original_select(candidates, limit)
+    )
+
+    data = crawler.crawl_product_page("https://shop.myshopify.com/products/water-mask")
+
+    # 제품 JSON에 통화가 없으면 상점 정보(/meta.json)에서 채웁니다.
+    assert requested == [
+        "https://shop.myshopify.com/products/water-mask.json",
+        "https://shop.myshopify.com/meta.json",
+    ]
+    assert data["name"] == "Water Sleeping Mask"
+    assert data["brand"] == "LANEIGE"
+    assert data["price"] == "32.00"
+    assert data["currency"] == "USD"
+    assert data["images"] == ["https://cdn.shopify.com/s/files/1/products/mask.jpg?v=1"]
+    assert data["benefits"]
+
+
+def test_parse_shopify_product_reads_currency_from_payload():
+    payload = {"product": dict(SHOPIFY_PAYLOAD["product"], variants=[{
+        "price": "32.00",
+        "presentment_prices": [{"price": {"amount": "32.00", "currency_code": "KRW"}}],
+    }])}
+
+    assert site_extractors.parse_shopify_product(payload)["currency"] == "KRW"
+    # 통화를 알 수 없으면 빈 문자열 대신 키를 넣지 않습니다.
+    assert "currency" not in site_extractors.parse_shopify_product(SHOPIFY_PAYLOAD)
+
+
+def test_shop_currency_failure_leaves_currency_empty(monkeypatch):
+    def failing_fetch(url, timeout=20):
+        raise RuntimeError("제품 JSON 다운로드에 실패했습니다.")
+
+    monkeypatch.setattr(crawler, "_shop_currencies", {})
+    monkeypatch.setattr(crawler, "fetch_json", failing_fetch)
+
+    assert crawler.shop_currency("https://shop.myshopify.com/meta.json") == ""
+    assert crawler._shop_currencies == {}
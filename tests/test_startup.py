@@ -0,0 +1,67 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SERVER_DIR = Path(__file__).resolve().parents[1] / "server"
+# 느린 CI에서는 환경 변수로 예산을 늘릴 수 있습니다.
+IMPORT_BUDGET = float(os.environ.get("STARTUP_IMPORT_BUDGET", 1.5))
+HEALTH_BUDGET = float(os.environ.get("STARTUP_HEALTH_BUDGET", 5.0))
+HEAVY_MODULES = ("google.generativeai", "requests", "bs4", "soupsieve", "PIL.Image")
+
+IMPORT_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import server
+elapsed = time.perf_counter() - started
+print(json.dumps({{"seconds": elapsed, "loaded": [m for m in {HEAVY_MODULES!r} if m in sys.modules]}}))
+"""
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_server_import_is_fast_and_lazy():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT], cwd=SERVER_DIR, capture_output=True, text=True, check=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    print(f"\n[startup] import server: {result['seconds'] * 1000:.0f} ms")
+
+    # /health에 필요 없는 무거운 의존성은 import 시점에 로드하지 않습니다.
+    assert result["loaded"] == []
+    assert result["seconds"] < IMPORT_BUDGET
+
+
+def test_first_health_response_time():
+    port = _free_port()
+    env = dict(os.environ, SERVER_PORT=str(port), PYTHONUNBUFFERED="1")
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "server.py"], cwd=SERVER_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    elapsed = None
+    try:
+        while time.perf_counter() - started < HEALTH_BUDGET * 2:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1) as response:
+                    if response.status == 200:
+                        elapsed = time.perf_counter() - started
+                        break
+            except OSError:
+                time.sleep(0.02)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+    assert elapsed is not None, "서버가 /health에 응답하지 않았습니다"
+    print(f"\n[startup] first /health 200: {elapsed * 1000:.0f} ms")
+    assert elapsed < HEALTH_BUDGET
@@ -0,0 +1,139 @@
+import json
+import os
+
+import pytest
+
+from server import video_proxy
+
+
+def _probe_output(width, height, rate, codec="h264", duration="4.0"):
+    return json.dumps({
+        "format": {"format_name": "mov,mp4", "duration": duration, "size": "1000", "bit_rate": "2000"},
+        "streams": [
+            {"codec_type": "video", "codec_name": codec, "width": width, "height": height,
+             "avg_frame_rate": rate, "pix_fmt": "yuv420p"},
+            {"codec_type": "audio", "codec_name": "aac"},
+        ],
+    })
+
+
+@pytest.fixture
+def fake_tools(monkeypatch):
+    calls = []
+    state = {"probe": _probe_output(3840, 2160, "60/1")}
+
+    def fake_run(args, timeout):
+        calls.append(args)
+        if os.path.basename(args[0]) == "ffprobe":
+            return state["probe"]
+        # ffmpeg: 마지막 인자가 출력 경로입니다.
+        with open(args[-1], "wb") as handle:
+            handle.write(b"proxy")
+        return ""
+
+    monkeypatch.setattr(video_proxy, "find_tool", lambda name: f"/usr/bin/{name}")
+    monkeypatch.setattr(video_proxy, "_run", fake_run)
+    return calls, state
+
+
+def _make_source(tmp_path, content=b"source-video"):
+    source = tmp_path / "clip.mp4"
+    source.write_bytes(content)
+    return str(source)
+
+
+def test_probe_media_parses_streams(fake_tools, tmp_path):
+    _, state = fake_tools
+    state["probe"] = _probe_output(1920, 1080, "30000/1001")
+
+    meta = video_proxy.probe_media(_make_source(tmp_path))
+
+    assert meta["width"] == 1920
+    assert meta["fps"] == 29.97
+    assert meta["frames"] == 120
+    assert meta["hasAudio"] is True
+
+
+def test_mismatched_clip_gets_cached_proxy(fake_tools, tmp_path):
+    calls, _ = fake_tools
+    source = _make_source(tmp_path)
+    cache_dir = str(tmp_path / "proxies")
+
+    first = video_proxy.prepare_video(source, cache_dir)
+    second = video_proxy.prepare_video(source, cache_dir)
+
+    assert first["proxy"].endswith(".mov")
+    assert os.path.exists(first["proxy"])
+    assert (first["width"], first["height"], first["fps"]) == (1920, 1080, 30.0)
+    assert first["frames"] == 120
+    assert first["cached"] is False
+    assert second["cached"] is True
+    # ffprobe 1회 + ffmpeg 1회만 실행되고, 두 번째는 캐시를 재사용합니다.
+    assert len(calls) == 2
+
+
+def test_matching_intra_clip_skips_proxy(fake_tools, tmp_path):
+    calls, state = fake_tools
+    state["probe"] = _probe_output(1920, 1080, "30/1", codec="prores")
+
+    result = video_proxy.prepare_video(_make_source(tmp_path), str(tmp_path / "proxies"))
+
+    assert result["proxy"] is None
+    assert result["proxyReasons"] == []
+    assert len(calls) == 1
+
+
+def test_proxy_reasons_flags_long_gop():
+    meta = {"width": 1920, "height": 1080, "fps": 30.0, "codec": "h264"}
+
+    assert video_proxy.proxy_reasons(meta) == ["long-GOP codec h264"]
+
+
+def _cache_entry(cache_dir, key, size, age):
+    paths = [cache_dir / f"proxy_{key}.mov", cache_dir / f"proxy_{key}.json"]
+    paths[0].write_bytes(b"m" * size)
+    paths[1].write_text("{}")
+    for path in paths:
+        old = os.path.getmtime(path) - age
+        os.utime(path, (old, old))
+    return paths
+
+
+def test_cleanup_proxy_cache_evicts_old_and_oversized_entries(tmp_path):
+    cache_dir = tmp_path / "proxies"
+    cache_dir.mkdir()
+    mb = 1024 * 1024
+    stale = _cache_entry(cache_dir, "stale", mb, 100 * 3600)
+    oldest = _cache_entry(cache_dir, "oldest", 2 * mb, 3 * 3600)
+    recent = _cache_entry(cache_dir, "recent", 2 * mb, 60)
+    # 다른 프로세스가 변환 중일 수 있는 임시 파일은 남깁니다.
+    in_progress = cache_dir / "proxy_busy.mov.1234abcd.tmp.mov"
+    in_progress.write_bytes(b"partial")
+
+    video_proxy.cleanup_proxy_cache(str(cache_dir), max_age_hours=72, max_mb=3, min_interval=0)
+
+    assert not any(path.exists() for path in stale + oldest)
+    assert all(path.exists() for path in recent)
+    assert in_progress.exists()
+
+
+def test_cached_proxy_use_refreshes_its_age(fake_tools, tmp_path):
+    cache_dir = tmp_path / "proxies"
+    first = video_proxy.prepare_video(_make_source(tmp_path), str(cache_dir))
+    for path in cache_dir.iterdir():
+        old = os.path.getmtime(path) - 100 * 3600
+        os.utime(path, (old, old))
+
+    video_proxy.prepare_video(_make_source(tmp_path), str(cache_dir))
+    video_proxy.cleanup_proxy_cache(str(cache_dir), max_age_hours=72, min_interval=0)
+
+    assert os.path.exists(first["proxy"])
+
+
+def test_invalid_proxy_workers_env_falls_back_to_default(monkeypatch):
+    monkeypatch.setenv("PROXY_WORKERS", "two")
+    assert video_proxy._env_int("PROXY_WORKERS", 2) == 2
+    monkeypatch.setenv("PROXY_WORKERS", "0")
+    assert video_proxy._env_int("PROXY_WORKERS", 2) == 2
+    monkeypatch.setenv("PROXY_WORKERS", "4")
+    assert video_proxy._env_int("PROXY_WORKERS", 2) == 4